@@ -0,0 +1,209 @@
+# Incremental merge of LLM result shards into the recipe catalogue.
+# Replaces re-running the "Merging Recipes" cells of recipes_table_prep.ipynb for every new batch:
+# only shards that were not merged before are validated and appended to the catalogue,
+# and the running app (app/app.py) picks the appended rows up without restarting.
+#
+# Usage (from the repository root):
+#   > python LLM/merge_results.py                         # merge every new shard in LLM/batched_recipes_results
+#   > python LLM/merge_results.py path/to/shard.csv ...   # merge specific shards
+#   > python LLM/merge_results.py --rebuild               # rebuild the catalogue from all shards
+
+
+# Imports
+import argparse
+import glob
+import json
+import os
+import sys
+import uuid
+
+import pandas as pd
+# ----------------------------------------------------
+
+# --- Configuration ---
+# Directory with processed CSV files
+INPUT_DIR = "LLM/batched_recipes_results"
+# Catalogue read by the app
+CATALOGUE_PATH = "LLM/merged_final_results.csv"
+
+# Columns a shard must have to be usable by the app
+REQUIRED_COLUMNS = ['title', 'ingredients_raw', 'ingredients_processed', 'instructions', 'cuisine_tags', 'vegan', 'vegetarian']
+
+
+# Path of the manifest written next to the catalogue
+def catalogue_manifest_path(catalogue_path):
+    return os.path.splitext(catalogue_path)[0] + '.manifest.json'
+
+
+# Load the manifest of already merged shards
+def load_manifest(catalogue_path):
+    """
+    Load the merge manifest of the catalogue.
+    Args:
+        catalogue_path (str): Path of the merged catalogue CSV.
+    Returns:
+        dict: The manifest, or None if the catalogue has no manifest yet.
+    """
+    manifest_path = catalogue_manifest_path(catalogue_path)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+# Write the manifest atomically, so readers never see a half-written file
+def save_manifest(catalogue_path, manifest):
+    manifest_path = catalogue_manifest_path(catalogue_path)
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+# Check that the JSON columns of a row can be parsed into lists
+def is_json_list(val):
+    try:
+        return isinstance(json.loads(val), list)
+    except (json.JSONDecodeError, TypeError):
+        return False
+
+
+# Validate a result shard before merging it
+def validate_shard(shard_path, columns=None):
+    """
+    Read and clean a result shard written by process_batch.py.
+    Args:
+        shard_path (str): Path of the shard CSV.
+        columns (list): Column order of the catalogue, if it already exists.
+    Returns:
+        pd.DataFrame: The rows to merge, in catalogue column order.
+    Raises:
+        ValueError: If the shard cannot be read or is missing required columns.
+    """
+    try:
+        df = pd.read_csv(shard_path)
+    except Exception as e:
+        raise ValueError(f"Could not read {shard_path}: {e}")
+
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"{shard_path} is missing columns: {missing}")
+
+    # Delete rows where the LLM analysis failed (missing or unparsable output)
+    valid = df['ingredients_processed'].apply(is_json_list) & df['cuisine_tags'].apply(is_json_list)
+    dropped = int((~valid).sum())
+    if dropped:
+        print(f"{os.path.basename(shard_path)}: dropping {dropped} rows with missing LLM output.")
+    df = df[valid]
+
+    # Align with the catalogue columns (extra columns are dropped, missing ones left empty)
+    if columns is not None:
+        df = df.reindex(columns=columns)
+    return df
+
+
+# Append validated shards to the catalogue
+def merge_shards(shard_paths, catalogue_path=CATALOGUE_PATH, rebuild=False):
+    """
+    Append the shards that were not merged before to the catalogue.
+    Args:
+        shard_paths (list): Paths of the result shards.
+        catalogue_path (str): Path of the merged catalogue CSV.
+        rebuild (bool): Start a new catalogue instead of appending to the existing one.
+    Returns:
+        int: The number of recipes appended.
+    """
+    manifest = None if rebuild else load_manifest(catalogue_path)
+
+    if manifest is None:
+        if os.path.exists(catalogue_path) and not rebuild:
+            raise ValueError(f"{catalogue_path} has no merge manifest; run once with --rebuild.")
+        # A new catalogue id tells running apps to drop their index and reload
+        manifest = {'catalogue_id': uuid.uuid4().hex, 'catalogue_bytes': 0, 'recipes': 0, 'shards': {}}
+        # Build the new catalogue next to the old one, which is only replaced once a shard merged
+        write_path = catalogue_path + '.rebuild.tmp'
+        if os.path.exists(write_path):
+            os.remove(write_path)
+        columns = None
+    elif (manifest['catalogue_bytes'] == 0 or not os.path.exists(catalogue_path)
+          or os.path.getsize(catalogue_path) < manifest['catalogue_bytes']):
+        # Nothing committed yet, or the catalogue was deleted or cut short: start an empty catalogue
+        if manifest['shards']:
+            print(f"Warning: {catalogue_path} is missing or shorter than its manifest; starting a new catalogue.")
+        manifest = {'catalogue_id': uuid.uuid4().hex, 'catalogue_bytes': 0, 'recipes': 0, 'shards': {}}
+        write_path = catalogue_path
+        open(catalogue_path, 'wb').close()
+        save_manifest(catalogue_path, manifest)
+        columns = None
+    else:
+        write_path = catalogue_path
+        columns = list(pd.read_csv(catalogue_path, nrows=0).columns)
+        # Drop bytes of a merge that crashed before the manifest was updated
+        with open(catalogue_path, 'r+b') as f:
+            f.truncate(manifest['catalogue_bytes'])
+
+    appended = 0
+    for shard_path in shard_paths:
+        shard_name = os.path.basename(shard_path)
+        if shard_name in manifest['shards']:
+            continue
+
+        try:
+            df = validate_shard(shard_path, columns)
+        except ValueError as e:
+            print(f"Warning: {e}. Skipping.")
+            continue
+
+        write_header = columns is None
+        with open(write_path, 'a', newline='') as f:
+            df.to_csv(f, index=False, header=write_header)
+        if write_header:
+            columns = list(df.columns)
+
+        # Commit the shard: the app only reads up to catalogue_bytes
+        manifest['catalogue_bytes'] = os.path.getsize(write_path)
+        manifest['recipes'] += len(df)
+        manifest['shards'][shard_name] = {'rows': len(df)}
+        if write_path == catalogue_path:
+            save_manifest(catalogue_path, manifest)
+
+        appended += len(df)
+        print(f"Merged {len(df)} recipes from {shard_name}.")
+
+    if write_path != catalogue_path:
+        if not manifest['shards']:
+            if os.path.exists(write_path):
+                os.remove(write_path)
+            raise ValueError(f"no shard could be merged; {catalogue_path} was left unchanged")
+        # Swap the rebuilt catalogue in. The empty manifest with the new id first makes running apps
+        # drop their index, instead of reading the new file at the offsets of the old one
+        save_manifest(catalogue_path, dict(manifest, catalogue_bytes=0, recipes=0, shards={}))
+        os.replace(write_path, catalogue_path)
+        save_manifest(catalogue_path, manifest)
+
+    return appended
+
+
+# Define main function to run the merge
+def main():
+    parser = argparse.ArgumentParser(description="Merge LLM result shards into the recipe catalogue.")
+    parser.add_argument('shards', nargs='*', help=f"Shard CSV files (default: every CSV in {INPUT_DIR})")
+    parser.add_argument('--catalogue', default=CATALOGUE_PATH, help="Path of the merged catalogue CSV")
+    parser.add_argument('--rebuild', action='store_true', help="Rebuild the catalogue from scratch")
+    args = parser.parse_args()
+
+    shard_paths = args.shards or sorted(glob.glob(os.path.join(INPUT_DIR, '*.csv')))
+    print(f"Found {len(shard_paths)} shard files.")
+
+    try:
+        appended = merge_shards(shard_paths, args.catalogue, rebuild=args.rebuild)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    manifest = load_manifest(args.catalogue)
+    print(f"Appended {appended} recipes; the catalogue now holds {manifest['recipes'] if manifest else 0} recipes.")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,8 @@
 # module load cuda/12.8.0
 # pip3 install --user pandas transformers torch torchvision torchaudio accelerate bitsandbytes
 # python3 process_batch.py recipes_batch_0001.csv LLM/testing_batch_results/recipes_batch_0001.csv
+# faster decoding with the same output (draft tokens copied from the prompt):
+# PROCESS_BATCH_DECODING=prompt_lookup python3 process_batch.py recipes_batch_0001.csv LLM/testing_batch_results/recipes_batch_0001.csv
 
 
 # Import necessary libraries
@@ -11,10 +13,28 @@ from transformers import AutoModelForCausalLM, AutoTokenizer, BitsAndBytesConfig
 import pandas as pd
 import sys
 import json
+import os
+import time
 
 # --- Configuration ---
-# Model used
-MODEL_NAME = "microsoft/Phi-3-mini-4k-instruct"
+# Model used (PROCESS_BATCH_MODEL can point to another model, e.g. a tiny local one for benchmarks)
+MODEL_NAME = os.environ.get("PROCESS_BATCH_MODEL", "microsoft/Phi-3-mini-4k-instruct")
+# Maximum length of the generated output
+MAX_NEW_TOKENS = int(os.environ.get("PROCESS_BATCH_MAX_NEW_TOKENS", "2000"))
+
+# Decoding mode (PROCESS_BATCH_DECODING):
+#   "default":       plain model.generate
+#   "prompt_lookup": draft tokens are copied from n-grams of the prompt, e.g. ingredient names from ingredients_raw
+#   "draft_model":   a small draft model (PROCESS_BATCH_DRAFT_MODEL) proposes the tokens
+# The main model verifies every draft token, so under greedy decoding the output is the same as "default".
+DECODING_MODES = ["default", "prompt_lookup", "draft_model"]
+DECODING_MODE = os.environ.get("PROCESS_BATCH_DECODING", "default")
+# Number of tokens copied from the prompt per lookup
+PROMPT_LOOKUP_NUM_TOKENS = int(os.environ.get("PROCESS_BATCH_PROMPT_LOOKUP_TOKENS", "10"))
+DRAFT_MODEL_NAME = os.environ.get("PROCESS_BATCH_DRAFT_MODEL")
+# Optional JSON lines file with the generated token ids and the decoded response of every recipe
+# (benchmarks/run_benchmarks.py compares them to check that the decoding modes generate the same tokens)
+RESPONSES_PATH = os.environ.get("PROCESS_BATCH_RESPONSES_PATH")
 
 # BitsAndBytesConfig to decrease memory usage
 bnb_config = BitsAndBytesConfig(
@@ -73,6 +93,14 @@ output_csv_path = sys.argv[2]
 
 print(f"Input batch file: {input_csv_path}")
 print(f"Output results file: {output_csv_path}")
+print(f"Decoding mode: {DECODING_MODE}")
+
+if DECODING_MODE not in DECODING_MODES:
+    print(f"Error: PROCESS_BATCH_DECODING must be one of {DECODING_MODES}")
+    sys.exit(1)
+if DECODING_MODE == "draft_model" and not DRAFT_MODEL_NAME:
+    print("Error: the draft_model decoding mode needs PROCESS_BATCH_DRAFT_MODEL")
+    sys.exit(1)
 
 # --- Load the Batch Data ---
 try:
@@ -126,7 +154,7 @@ try:
 
     model = AutoModelForCausalLM.from_pretrained(
         MODEL_NAME,
-        quantization_config=bnb_config,
+        quantization_config=bnb_config if device == "cuda" else None, # 4-bit quantization needs a GPU
         low_cpu_mem_usage=True if device == "cpu" else False,
         torch_dtype=torch.bfloat16 if device == "cuda" and torch.cuda.is_available() and torch.cuda.get_device_capability()[0] >= 8 else torch.float32 # Use bfloat16 on newer GPUs
     )
@@ -139,6 +167,22 @@ try:
     # Set the model to evaluation mode
     model.eval()
 
+    # Extra arguments of model.generate for the accelerated decoding modes (greedy, so the output is unchanged)
+    generation_kwargs = {}
+    if DECODING_MODE == "prompt_lookup":
+        generation_kwargs = {"do_sample": False, "prompt_lookup_num_tokens": PROMPT_LOOKUP_NUM_TOKENS}
+    elif DECODING_MODE == "draft_model":
+        print(f"Loading draft model {DRAFT_MODEL_NAME}...")
+        draft_model = AutoModelForCausalLM.from_pretrained(DRAFT_MODEL_NAME, torch_dtype=model.dtype)
+        draft_model.to(device)
+        draft_model.eval()
+        generation_kwargs = {"do_sample": False, "assistant_model": draft_model}
+        # A draft model with a different tokenizer needs both tokenizers (universal assisted decoding)
+        draft_tokenizer = AutoTokenizer.from_pretrained(DRAFT_MODEL_NAME)
+        if draft_tokenizer.get_vocab() != tokenizer.get_vocab():
+            generation_kwargs.update(tokenizer=tokenizer, assistant_tokenizer=draft_tokenizer)
+        print("Draft model loaded.")
+
 except Exception as e:
     print(f"\n--- Model Loading Error ---")
     print(f"An error occurred during model loading: {e}")
@@ -152,6 +196,12 @@ except Exception as e:
 
 # --- Processing Loop (Iterate through each recipe in the batch) ---
 print("\n--- Starting Batch Processing ---")
+batch_start_time = time.perf_counter()
+# Decode throughput (time spent in model.generate only)
+generated_tokens = 0
+generation_seconds = 0.0
+# Raw model output per recipe, saved to RESPONSES_PATH
+responses = []
 
 # Iterate over rows of the DataFrame
 for index, row in df.iterrows():
@@ -182,15 +232,22 @@ for index, row in df.iterrows():
         input_ids = tokenizer(input_text, return_tensors="pt").to(device)
 
         # Generate a response from the model
+        generation_start_time = time.perf_counter()
         with torch.no_grad():
             output_ids = model.generate(
                 input_ids.input_ids,
-                max_new_tokens=2000, # the output length
+                max_new_tokens=MAX_NEW_TOKENS, # the output length
                 pad_token_id=tokenizer.eos_token_id,
+                **generation_kwargs,
             )
+        generation_seconds += time.perf_counter() - generation_start_time
+        generated_tokens += output_ids.shape[1] - input_ids.input_ids.shape[1]
 
         # Decode the generated response
-        model_response_content = tokenizer.decode(output_ids[0][input_ids.input_ids.shape[1]:], skip_special_tokens=True)
+        generated_ids = output_ids[0][input_ids.input_ids.shape[1]:]
+        model_response_content = tokenizer.decode(generated_ids, skip_special_tokens=True)
+        if RESPONSES_PATH:
+            responses.append({"index": int(index), "generated_token_ids": generated_ids.tolist(), "response": model_response_content})
 
         # --- Parse the Model's JSON Output ---
         json_start = model_response_content.find('{')
@@ -244,7 +301,12 @@ for index, row in df.iterrows():
         print(f"An unexpected error occurred processing recipe at index {index}: {e}")
         df.loc[index, 'processing_error'] = f"Unexpected error: {e}"
 
+batch_seconds = time.perf_counter() - batch_start_time
 print("Batch processing complete.")
+# Throughput line parsed by benchmarks/run_benchmarks.py
+print(f"Processed {len(df)} recipes in {batch_seconds:.2f} s ({len(df) / batch_seconds:.3f} recipes/sec)")
+if generation_seconds > 0:
+    print(f"Generated {generated_tokens} tokens in {generation_seconds:.2f} s ({generated_tokens / generation_seconds:.3f} tokens/sec)")
 
 
 # --- Save the Processed Data ---
@@ -257,6 +319,16 @@ except Exception as e:
     print(f"Error saving results to {output_csv_path}: {e}")
     sys.exit(1)
 
+if RESPONSES_PATH:
+    try:
+        with open(RESPONSES_PATH, "w") as f:
+            for response in responses:
+                f.write(json.dumps(response) + "\n")
+        print(f"Model responses saved to {RESPONSES_PATH}")
+    except Exception as e:
+        print(f"Error saving model responses to {RESPONSES_PATH}: {e}")
+        sys.exit(1)
+
 # --- Script Finished ---
 print("Script finished successfully.")
 sys.exit(0)
@@ -3,18 +3,44 @@
 
 # Imports
 import ast
-import json
+import io
+import os
 import pandas as pd
 from PIL import Image
 import streamlit as st
+from recipe_index import RecipeIndex
+from pantry_planner import plan_recipes
+from profiling import AppProfiler, profiling_enabled
 # ----------------------------------------------------
 
 # Set page title and icon
 st.set_page_config(page_title="Anti-Food Waste Recommender", page_icon="🥦", layout="centered")
 
+# Streamlit reruns this whole script on every interaction: time the phases of each rerun
+@st.cache_resource
+def load_profiler():
+    return AppProfiler(log_path=os.environ.get('APP_PROFILE_LOG'))
+
+profiler = load_profiler()
+rerun = profiler.new_rerun()
+
+# Maximum width Streamlit displays images at; wider images are resized by st.image on every rerun
+HERO_IMAGE_WIDTH = 1460
+
+# Decode and resize the hero image once per server process instead of on every rerun
+@st.cache_resource
+def load_hero_image():
+    profiler.count_cache_miss('hero image')
+    hero_image = Image.open("app/anti_food_waste_hero.png")
+    if hero_image.width > HERO_IMAGE_WIDTH:
+        hero_image = hero_image.resize((HERO_IMAGE_WIDTH, hero_image.height * HERO_IMAGE_WIDTH // hero_image.width))
+    image_bytes = io.BytesIO()
+    hero_image.save(image_bytes, format="PNG")
+    return image_bytes.getvalue()
+
 # Display a motivational image in the beginning of the page
-hero_image = Image.open("app/anti_food_waste_hero.png")
-st.image(hero_image, use_container_width=True)
+profiler.count_cache_call('hero image')
+st.image(load_hero_image(), use_container_width=True)
 
 # Title and description
 st.title("🥕 Anti-Food Waste Recommender")
@@ -33,23 +59,7 @@ st.markdown(
     """,
     unsafe_allow_html=True,
 )
-
-# Function to normalize ingredient names
-def normalize_ingredient_name(name):
-    name = name.lower().strip()
-    if name.endswith('s') and not name.endswith('ss'):
-        name = name[:-1]  # Remove plural s
-    return name
-
-# Function to match ingredients in the recipe
-def match_ingredient(ingredient_name, user_input_ingredient):
-    ing = normalize_ingredient_name(ingredient_name)
-    user_ing = normalize_ingredient_name(user_input_ingredient)
-
-    if len(user_ing.split()) == 1:
-        return user_ing in ing  # single word: partial match allowed
-    else:
-        return ing == user_ing  # multi-word: exact match only
+rerun.mark('page header')
 
 # Ask the user if they have any dietary restrictions
 vegan_input = st.radio("Would you like to see only vegan recipes suggestions? *", ('Yes', 'No'), index=None)
@@ -74,71 +84,56 @@ CUISINE_WHITELIST = {
     'Southwestern', 'Spanish', 'Tex-Mex', 'Thai', 'Vietnamese', 'West African', 'Western'
 }
 
-# Load once for tag extraction
-df_preview = pd.read_csv('LLM/merged_final_results.csv')
-
-# Extract cuisines and other tags
-cuisine_set = set()
-other_tag_set = set()
-
-for val in df_preview['cuisine_tags'].dropna():
-    try:
-        tags = json.loads(val) if isinstance(val, str) else val
-        if isinstance(tags, list):
-            for tag in tags:
-                tag_clean = tag.strip()
-                if tag_clean in CUISINE_WHITELIST:
-                    cuisine_set.add(tag_clean)
-                elif tag_clean not in {"Vegan", "Vegetarian"}:
-                    other_tag_set.add(tag_clean)
-    except Exception:
-        continue
+# Recipe catalogue, merged incrementally by LLM/merge_results.py
+CATALOGUE_PATH = 'LLM/merged_final_results.csv'
+
+# Load the catalogue and build the search index once per server process
+@st.cache_resource
+def load_recipe_index():
+    profiler.count_cache_miss('recipe index')
+    return RecipeIndex.from_csv(CATALOGUE_PATH)
+
+profiler.count_cache_call('recipe index')
+recipe_index = load_recipe_index()
+# Pick up shards merged since the last rerun (reads only the appended rows)
+recipe_index.refresh()
+rerun.mark('load index')
+
+# Split tags into sorted cuisine and other tag options; only recomputed when the index changed
+# (the version changes when recipes are added and when a rebuilt catalogue resets the index)
+@st.cache_data
+def load_tag_options(index_version, _recipe_index):
+    profiler.count_cache_miss('tag options')
+    cuisine_set = set()
+    other_tag_set = set()
+
+    for tag_clean in _recipe_index.tags():
+        if tag_clean in CUISINE_WHITELIST:
+            cuisine_set.add(tag_clean)
+        elif tag_clean not in {"Vegan", "Vegetarian"}:
+            other_tag_set.add(tag_clean)
+
+    return sorted(cuisine_set), sorted(other_tag_set)
+
+profiler.count_cache_call('tag options')
+cuisine_options, other_tag_options = load_tag_options(recipe_index.version, recipe_index)
+rerun.mark('tag options')
 
 # UI: user selects cuisine types and other tags
-selected_cuisines = st.multiselect("🌍 Filter by Cuisine Type (you can select multiple options)", sorted(cuisine_set))
-selected_other_tags = st.multiselect("🏷️ Filter by Other Tags (you can select multiple options)", sorted(other_tag_set))
-
-# Function to find recipes that use only heat-processed ingredients matching user input
-def find_heat_processed_ingredient(df, ingredient_names, vegan=False, vegetarian=False):
-    result = []
-
-    # Loop through each recipe row in the dataframe
-    for index, row in df.iterrows():
-        # Check dietary restrictions: skip if vegan/vegetarian is required and the recipe doesn't match
-        if (vegan and not row['vegan']) or (vegetarian and not row['vegetarian']):
-            continue  # Skip this recipe if it doesn't match the restrictions
-        try:
-            ingredients = json.loads(row['ingredients_processed'])
-        except (json.JSONDecodeError, TypeError) as e:
-            continue  # Skip this row if parsing fails
-
-        all_ingredients_matched = True # Assume all user ingredients match initially
-
-        # For each ingredient the user entered
-        for user_input_ingredient in ingredient_names:
-            ingredient_found = False
-            # Go through all ingredients listed in the recipe
-            for ingredient in ingredients:
-                if isinstance(ingredient, dict) and 'ingredient' in ingredient and 'heat_processed' in ingredient:
-                    # Match ingredient name and ensure it is heat-processed
-                    if match_ingredient(ingredient['ingredient'], user_input_ingredient) and ingredient['heat_processed']:
-                        ingredient_found = True
-                        break # No need to search further if matched
-
-            # If the current user input ingredient was not found in the recipe, then reject this recipe
-            if not ingredient_found:
-                all_ingredients_matched = False
-                break
-        # If all user ingredients are matched in the recipe, add the recipe to the result
-        if all_ingredients_matched:
-            result.append(row)
-    return result
+selected_cuisines = st.multiselect("🌍 Filter by Cuisine Type (you can select multiple options)", cuisine_options)
+selected_other_tags = st.multiselect("🏷️ Filter by Other Tags (you can select multiple options)", other_tag_options)
 
 # Ingredient input
 st.header("🥬 Enter Ingredients")
 st.warning("⚠️ Be careful with spelling mistakes!")
 ingredients = st.text_area("Enter your ingredients (comma-separated)", placeholder="e.g., tomatoes, onions, garlic")
 
+# Planner mode for large inventories (e.g. supermarkets or food-sharing platforms)
+planner_mode = st.checkbox("🧺 I have many ingredients: suggest a few recipes that together use up as many of them as possible")
+if planner_mode:
+    max_planned_recipes = st.number_input("Maximum number of recipes", min_value=1, max_value=20, value=5)
+rerun.mark('widgets')
+
 # Button to trigger recipe search
 if st.button("Find Recipes 🍽️"):
 
@@ -147,37 +142,21 @@ if st.button("Find Recipes 🍽️"):
         st.warning("Please answer both vegan and vegetarian questions before proceeding.")
     else:
         if ingredients:
-            # Normalize and clean up user input ingredients
-            ingredient_names = [normalize_ingredient_name(ingredient.strip()) for ingredient in ingredients.split(',')]
-            # Load recipe data
-            df = pd.read_csv('LLM/merged_final_results.csv')
-
-            # Filter recipes by cuisine or tag selections
-            def recipe_matches_filters(row):
-                try:
-                    tags = json.loads(row['cuisine_tags']) if isinstance(row['cuisine_tags'], str) else row['cuisine_tags']
-                    tags_set = set(tags)
-                    cuisine_ok = not selected_cuisines or any(tag in tags_set for tag in selected_cuisines)
-                    other_ok = not selected_other_tags or any(tag in tags_set for tag in selected_other_tags)
-
-                    return cuisine_ok and other_ok
-                except Exception:
-                    return False
-
-            df = df[df.apply(recipe_matches_filters, axis=1)]
-
-            # Convert string "TRUE"/"FALSE" to boolean True/False
-            df['vegan'] = df['vegan'].astype(str).str.lower().map({'true': True, 'false': False})
-            df['vegetarian'] = df['vegetarian'].astype(str).str.lower().map({'true': True, 'false': False})
-
-            # Fix wrongly labeled recipes that mention steak
-            df.loc[
-                df['ingredients_raw'].str.contains('steak', case=False, na=False),
-                ['vegan', 'vegetarian']
-            ] = False
-            
-            # Find matching recipes based on ingredients and dietary restrictions
-            matching_recipes = find_heat_processed_ingredient(df, ingredient_names, vegan, vegetarian)
+            # Clean up user input ingredients (the index folds case and plurals)
+            ingredient_names = [ingredient.strip() for ingredient in ingredients.split(',')]
+            # Other sessions may refresh the shared index: look up the recipes in the same snapshot as the search
+            with recipe_index.lock:
+                if planner_mode:
+                    # Pick a few recipes that together use the most ingredients
+                    plan, unused_ingredients = plan_recipes(recipe_index, ingredient_names, max_planned_recipes,
+                                                            vegan, vegetarian, selected_cuisines, selected_other_tags)
+                    matching_ids = [recipe_id for recipe_id, _ in plan]
+                    used_ingredients = [used for _, used in plan]
+                else:
+                    # Find matching recipes based on ingredients, dietary restrictions and tag selections
+                    matching_ids = recipe_index.search(ingredient_names, vegan, vegetarian, selected_cuisines, selected_other_tags)
+                matching_recipes = [recipe_index.recipe(recipe_id) for recipe_id in matching_ids]
+            rerun.mark('search')
             
             if matching_recipes:
                 # Create a list of recipe titles
@@ -187,10 +166,15 @@ if st.button("Find Recipes 🍽️"):
                 st.markdown("Here are the recipes that match your criteria:")
                 for i, recipe_title in enumerate(recipe_titles, 1):
                     anchor_id = f"recipe-{i}"
+                    # In planner mode, show which of the ingredients each recipe uses up
+                    uses = f" (uses up: {', '.join(used_ingredients[i - 1])})" if planner_mode else ""
                     st.markdown(
-                        f'<a href="#{anchor_id}" style="color: white">{i}. <strong>{recipe_title}</strong></a>',
+                        f'<a href="#{anchor_id}" style="color: white">{i}. <strong>{recipe_title}</strong>{uses}</a>',
                         unsafe_allow_html=True)
 
+                if planner_mode and unused_ingredients:
+                    st.info(f"No selected recipe uses: {', '.join(unused_ingredients)}")
+
                 st.markdown("<hr>", unsafe_allow_html=True)
                 st.write("Below you can find the corresponding details:")
 
@@ -233,4 +217,20 @@ if st.button("Find Recipes 🍽️"):
 
         else:
             # User didn't enter any ingredients
-            st.warning("Please enter ingredients to search for recipes.")
\ No newline at end of file
+            st.warning("Please enter ingredients to search for recipes.")
+rerun.mark('render results')
+
+# Opt-in profiling sidebar (APP_PROFILE=1 or ?profile=1)
+rerun_seconds = rerun.finish()
+if profiling_enabled(st.query_params):
+    with st.sidebar:
+        st.header("🛠️ Profiling")
+        st.write(f"This rerun: **{rerun_seconds * 1000:.1f} ms** (rerun #{profiler.reruns} of this server)")
+        st.write(f"Recipes in the index: {len(recipe_index)}")
+        st.dataframe(pd.DataFrame({
+            'this rerun (ms)': pd.Series({phase: seconds * 1000 for phase, seconds in rerun.phases.items()}),
+            'mean (ms)': pd.Series(profiler.mean_phase_ms()),
+        }).round(2))
+        st.write("**Cache hit rates**")
+        for name, hit_rate in profiler.cache_hit_rates().items():
+            st.write(f"- {name}: {hit_rate:.0%}")
@@ -0,0 +1,167 @@
+# Canonical ingredient vocabulary for the recipe index (app/recipe_index.py).
+#
+# Ingredient names in ingredients_processed are free text from the LLM ("Romaine heart", "romaine hearts").
+# Each distinct name is canonicalized once (case, plurals, synonyms) and interned into an integer id,
+# so that recipes are stored as arrays of ids and matching works on integer sets.
+# The names are also kept in the app's original normalized form, and lookups match on both forms,
+# so folding only ever adds matches to the ones the original row scan finds.
+
+# Imports
+import re
+from collections import OrderedDict
+# ----------------------------------------------------
+
+# Number of user inputs whose matches are cached. The vocabulary is shared by all sessions of the app,
+# so the cache is bounded (least recently used inputs are dropped)
+LOOKUP_CACHE_SIZE = 1024
+
+# Synonyms folded into one canonical name (applied after plural folding)
+INGREDIENT_SYNONYMS = {
+    'aubergine': 'eggplant',
+    'courgette': 'zucchini',
+    'capsicum': 'bell pepper',
+    'scallion': 'green onion',
+    'spring onion': 'green onion',
+    'garbanzo bean': 'chickpea',
+    'garbanzo': 'chickpea',
+    'rocket': 'arugula',
+    'coriander leaf': 'cilantro',
+    'beetroot': 'beet',
+    'prawn': 'shrimp',
+    'maize': 'corn',
+    'mangetout': 'snow pea',
+    'swede': 'rutabaga',
+}
+
+# Multi-word synonyms, replaced inside longer names ("chopped spring onion")
+_PHRASE_SYNONYMS = {k: v for k, v in INGREDIENT_SYNONYMS.items() if ' ' in k}
+
+# Plurals the suffix rules below get wrong
+IRREGULAR_PLURALS = {
+    'leaves': 'leaf',
+    'loaves': 'loaf',
+    'halves': 'half',
+    'knives': 'knife',
+    'chilies': 'chili',
+    'chillies': 'chilli',
+    'cookies': 'cookie',
+    'brownies': 'brownie',
+    'veggies': 'veggie',
+    'smoothies': 'smoothie',
+    'pierogies': 'pierogi',
+}
+
+
+# Function to normalize ingredient names (the app's original matching, see recipe_index.match_ingredient)
+def normalize_ingredient_name(name):
+    name = name.lower().strip()
+    if name.endswith('s') and not name.endswith('ss'):
+        name = name[:-1]  # Remove plural s
+    return name
+
+
+# Fold the plural of a single word
+def singular(word):
+    if word in IRREGULAR_PLURALS:
+        return IRREGULAR_PLURALS[word]
+    if len(word) <= 3:
+        return word
+    if word.endswith('ies') and len(word) > 4:
+        return word[:-3] + 'y'      # berries -> berry
+    if word.endswith(('oes', 'ches', 'shes', 'xes', 'sses', 'zes')):
+        return word[:-2]            # tomatoes -> tomato, peaches -> peach
+    if word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        return word[:-1]            # hearts -> heart
+    return word
+
+
+# Function to canonicalize an ingredient name
+def canonical_ingredient_name(name):
+    """
+    Canonicalize an ingredient name: lower case, single spaces, singular words and folded synonyms.
+    Args:
+        name (str): Ingredient name from the LLM output or from the user.
+    Returns:
+        str: The canonical name, e.g. "romaine heart" for "Romaine hearts".
+    """
+    words = [singular(word) for word in re.split(r'\s+', name.lower().strip()) if word]
+    words = [INGREDIENT_SYNONYMS.get(word, word) for word in words]
+    canonical = ' '.join(words)
+    if ' ' in canonical:
+        padded = f' {canonical} '
+        for phrase, replacement in _PHRASE_SYNONYMS.items():
+            padded = padded.replace(f' {phrase} ', f' {replacement} ')
+        canonical = padded.strip()
+    return canonical
+
+
+class IngredientVocabulary:
+    """
+    Interned table of canonical ingredient names.
+    Ingredient ids are dense integers in order of first appearance, so they can index lists and arrays.
+    """
+
+    def __init__(self):
+        self.names = []             # ingredient id -> canonical name
+        self.ids = {}               # canonical name -> ingredient id
+        self._raw_ids = {}          # raw LLM name -> ingredient id, so each spelling is canonicalized once
+        self._normalized_ids = {}   # normalize_ingredient_name(raw LLM name) -> ingredient ids
+        self._lookup_cache = OrderedDict()  # (canonical, normalized) user input -> matching ingredient ids
+
+    def __len__(self):
+        return len(self.names)
+
+    def intern(self, raw_name):
+        """Return the ingredient id of a raw ingredient name, adding it to the vocabulary if needed."""
+        ingredient_id = self._raw_ids.get(raw_name)
+        if ingredient_id is None:
+            canonical = canonical_ingredient_name(raw_name)
+            ingredient_id = self.ids.get(canonical)
+            if ingredient_id is None:
+                ingredient_id = len(self.names)
+                self.names.append(canonical)
+                self.ids[canonical] = ingredient_id
+            self._raw_ids[raw_name] = ingredient_id
+            normalized_ids = self._normalized_ids.setdefault(normalize_ingredient_name(raw_name), set())
+            if ingredient_id not in normalized_ids:
+                normalized_ids.add(ingredient_id)
+                self._lookup_cache.clear()  # new names can match cached user inputs
+        return ingredient_id
+
+    def lookup(self, user_input_ingredient):
+        """
+        Find the ingredient ids matching a user input.
+        A single word matches every ingredient containing it ("tomato" -> "cherry tomato"),
+        several words only match the exact ingredient. Both the canonical and the normalized
+        names are matched, so every ingredient the original row scan matches is found.
+        Args:
+            user_input_ingredient (str): Ingredient entered by the user.
+        Returns:
+            frozenset: The matching ingredient ids.
+        """
+        # Inputs that fold to the same names ("Tomatoes", "tomato ") share a cache entry
+        user_ing = canonical_ingredient_name(user_input_ingredient)
+        user_normalized = normalize_ingredient_name(user_input_ingredient)
+        key = (user_ing, user_normalized)
+        cached = self._lookup_cache.get(key)
+        if cached is not None:
+            self._lookup_cache.move_to_end(key)
+            return cached
+
+        # Partial or exact matching depends on the words the user typed, not on the folded name
+        # ("scallion" folds to "green onion" and still matches "chopped green onion")
+        if len(user_normalized.split()) == 1:
+            ids = {i for i, name in enumerate(self.names) if user_ing in name}
+            for name, normalized_ids in self._normalized_ids.items():
+                if user_normalized in name:
+                    ids |= normalized_ids
+        else:
+            ids = set(self._normalized_ids.get(user_normalized, ()))
+            if user_ing in self.ids:
+                ids.add(self.ids[user_ing])
+        ids = frozenset(ids)
+
+        self._lookup_cache[key] = ids
+        if len(self._lookup_cache) > LOOKUP_CACHE_SIZE:
+            self._lookup_cache.popitem(last=False)
+        return ids
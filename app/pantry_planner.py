@@ -0,0 +1,100 @@
+# Pantry planner for the Anti-Food Waste Recommender.
+#
+# Supermarkets and food-sharing platforms hold many near-expiry items at once. Instead of recipes that
+# contain all of the items, the planner picks a few recipes that together use as many items as possible
+# (heat processed, as in the normal search). This is greedy set cover over the ingredient postings of
+# the recipe index. The number of items each recipe uses up is kept in a numpy array, so the work per item
+# is vectorized over its postings instead of a Python loop over recipe ids.
+
+# Imports
+import numpy as np
+
+from ingredient_vocabulary import canonical_ingredient_name
+# ----------------------------------------------------
+
+
+# Union of sorted postings, restricted to the allowed recipes
+def union_of_postings(postings, allowed):
+    """
+    Merge the postings of the ingredients matching one item.
+    Args:
+        postings (list): Sorted numpy arrays of recipe ids (postings are appended in recipe id order).
+        allowed (np.ndarray): Boolean mask over recipe ids.
+    Returns:
+        np.ndarray: Sorted, distinct ids of the allowed recipes in any of the postings.
+    """
+    if not postings:
+        return np.empty(0, dtype=np.uint32)
+    if len(postings) == 1:
+        recipe_ids = postings[0]
+    else:
+        # Stable sort of 32-bit ints is a radix sort in numpy; duplicates end up next to each other
+        recipe_ids = np.sort(np.concatenate(postings), kind='stable')
+        if len(recipe_ids):
+            recipe_ids = recipe_ids[np.concatenate(([True], recipe_ids[1:] != recipe_ids[:-1]))]
+    return recipe_ids[allowed[recipe_ids]]
+
+
+# Function to plan recipes for a large inventory
+def plan_recipes(index, inventory, max_recipes=5, vegan=False, vegetarian=False, cuisines=(), other_tags=()):
+    """
+    Pick a small set of recipes that together use the most inventory items.
+    Args:
+        index (RecipeIndex): The recipe index of the app.
+        inventory (list): Ingredients to use up, as entered by the user.
+        max_recipes (int): Maximum number of recipes in the plan.
+        vegan (bool): Only use vegan recipes.
+        vegetarian (bool): Only use vegetarian recipes.
+        cuisines (list): Only use recipes with any of these cuisine tags (no filter if empty).
+        other_tags (list): Only use recipes with any of these other tags (no filter if empty).
+    Returns:
+        tuple: (plan, unused) where plan is a list of (recipe id, inventory items it uses up)
+               in the order picked, and unused lists the inventory items no chosen recipe uses.
+    """
+    # Drop empty items and items that fold to the same ingredient ("tomato", "tomatoes"), keeping the user's order
+    items, seen = [], set()
+    for item in inventory:
+        item = item.strip()
+        canonical = canonical_ingredient_name(item)
+        if item and canonical not in seen:
+            seen.add(canonical)
+            items.append(item)
+
+    # Under the index lock, so a refresh cannot add recipes between the filter and the postings
+    with index.lock:
+        n_recipes = len(index)
+        if not items or n_recipes == 0:
+            return [], items
+        allowed = np.unpackbits(np.frombuffer(index.allowed_recipes(vegan, vegetarian, cuisines, other_tags), dtype=np.uint8),
+                                bitorder='little')[:n_recipes].astype(bool)
+
+        # Item -> sorted ids of the allowed recipes where it is heat processed
+        item_recipes = []
+        for item in items:
+            postings = [np.frombuffer(posting, dtype=np.uint32) for posting in index.ingredient_postings(item)]
+            item_recipes.append(union_of_postings(postings, allowed))
+
+    # Recipe id -> number of uncovered items it uses up
+    gains = np.zeros(n_recipes, dtype=np.int32)
+    for recipe_ids in item_recipes:
+        gains[recipe_ids] += 1
+
+    uncovered = set(range(len(items)))
+    plan = []
+    while len(plan) < max_recipes:
+        # Highest gain; ties go to the recipe listed first in the catalogue
+        recipe_id = int(np.argmax(gains))
+        if gains[recipe_id] == 0:
+            break
+        new_items = []
+        for item_index in sorted(uncovered):
+            recipe_ids = item_recipes[item_index]
+            position = np.searchsorted(recipe_ids, recipe_id)
+            if position < len(recipe_ids) and recipe_ids[position] == recipe_id:
+                new_items.append(item_index)
+                gains[recipe_ids] -= 1
+        uncovered.difference_update(new_items)
+        plan.append((recipe_id, [items[i] for i in new_items]))
+
+    unused = [items[i] for i in sorted(uncovered)]
+    return plan, unused
@@ -0,0 +1,96 @@
+# Opt-in profiling of the Streamlit app (app/app.py).
+#
+# Streamlit runs the whole script again on every widget interaction, so the time per rerun is what users feel.
+# Every rerun is split into phases; the app shows the timings, rerun counts and cache hit rates in a debug
+# sidebar when started with APP_PROFILE=1 (or opened with ?profile=1), and appends one JSON line per rerun
+# to the file named by APP_PROFILE_LOG.
+
+# Imports
+import json
+import os
+import threading
+import time
+# ----------------------------------------------------
+
+
+class AppProfiler:
+    """
+    Counters shared by all sessions of one app server (keep a single instance with st.cache_resource).
+    """
+
+    def __init__(self, log_path=None):
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        self.reruns = 0
+        self.phase_totals = {}      # phase -> [number of reruns with the phase, total seconds]
+        self.cache_calls = {}       # cached function -> calls
+        self.cache_misses = {}      # cached function -> calls that had to compute the value
+
+    def new_rerun(self):
+        return RerunProfile(self)
+
+    def count_cache_call(self, name):
+        with self._lock:
+            self.cache_calls[name] = self.cache_calls.get(name, 0) + 1
+
+    def count_cache_miss(self, name):
+        with self._lock:
+            self.cache_misses[name] = self.cache_misses.get(name, 0) + 1
+
+    def cache_hit_rates(self):
+        """Return the share of calls of each cached function served from the cache."""
+        with self._lock:
+            return {name: 1 - self.cache_misses.get(name, 0) / calls for name, calls in self.cache_calls.items()}
+
+    def mean_phase_ms(self):
+        """Return the mean time of each phase over all reruns, in milliseconds."""
+        with self._lock:
+            return {phase: total / count * 1000 for phase, (count, total) in self.phase_totals.items()}
+
+    def _finish_rerun(self, phases, total_seconds):
+        with self._lock:
+            self.reruns += 1
+            rerun = self.reruns
+            for phase, seconds in phases.items():
+                count_total = self.phase_totals.setdefault(phase, [0, 0.0])
+                count_total[0] += 1
+                count_total[1] += seconds
+
+        if self.log_path:
+            record = {
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'rerun': rerun,
+                'total_ms': total_seconds * 1000,
+                'phases_ms': {phase: seconds * 1000 for phase, seconds in phases.items()},
+                'cache_hit_rates': self.cache_hit_rates(),
+            }
+            with self._lock, open(self.log_path, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+
+
+class RerunProfile:
+    """
+    Phase timings of a single run of the app script.
+    The script calls mark(name) at the end of each phase; the phase lasts since the previous mark.
+    """
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.phases = {}
+        self._start = self._last_mark = time.perf_counter()
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.phases[name] = self.phases.get(name, 0.0) + now - self._last_mark
+        self._last_mark = now
+
+    def finish(self):
+        """Record the rerun in the shared counters. Returns the total time of the rerun in seconds."""
+        total_seconds = time.perf_counter() - self._start
+        self.profiler._finish_rerun(self.phases, total_seconds)
+        return total_seconds
+
+
+# Check whether the profiling sidebar was asked for
+def profiling_enabled(query_params):
+    return os.environ.get('APP_PROFILE') == '1' or query_params.get('profile') == '1'
@@ -0,0 +1,386 @@
+# Search structures behind the Anti-Food Waste Recommender (app/app.py).
+#
+# The catalogue (LLM/merged_final_results.csv) is loaded once into a RecipeIndex:
+#   - recipe ingredients: interned ingredient ids (app/ingredient_vocabulary.py) in one flat int array,
+#     with a bitmask of the heat-processed ones
+#   - ingredient postings: ingredient id -> ids of the recipes where it is heat processed
+#   - tag bitsets: cuisine tag / dietary flag -> Python int with one bit per recipe id
+# Shards merged with LLM/merge_results.py are appended to the catalogue, and refresh()
+# reads only the appended rows, so adding recipes costs time in proportion to the delta.
+# The app shares one index between all sessions (st.cache_resource), so refresh() and every read
+# hold index.lock; hold it yourself around several calls that must see the same recipes.
+
+# Imports
+import io
+import itertools
+import json
+import os
+import threading
+from array import array
+
+import pandas as pd
+
+from ingredient_vocabulary import IngredientVocabulary, normalize_ingredient_name
+# ----------------------------------------------------
+
+
+# Function to match ingredients in the recipe
+def match_ingredient(ingredient_name, user_input_ingredient):
+    ing = normalize_ingredient_name(ingredient_name)
+    user_ing = normalize_ingredient_name(user_input_ingredient)
+
+    if len(user_ing.split()) == 1:
+        return user_ing in ing  # single word: partial match allowed
+    else:
+        return ing == user_ing  # multi-word: exact match only
+
+# Function to find recipes that use only heat-processed ingredients matching user input
+# (row-by-row scan, kept as the reference implementation for RecipeIndex.search)
+def find_heat_processed_ingredient(df, ingredient_names, vegan=False, vegetarian=False):
+    result = []
+
+    # Loop through each recipe row in the dataframe
+    for index, row in df.iterrows():
+        # Check dietary restrictions: skip if vegan/vegetarian is required and the recipe doesn't match
+        if (vegan and not row['vegan']) or (vegetarian and not row['vegetarian']):
+            continue  # Skip this recipe if it doesn't match the restrictions
+        try:
+            ingredients = json.loads(row['ingredients_processed'])
+        except (json.JSONDecodeError, TypeError) as e:
+            continue  # Skip this row if parsing fails
+
+        all_ingredients_matched = True # Assume all user ingredients match initially
+
+        # For each ingredient the user entered
+        for user_input_ingredient in ingredient_names:
+            ingredient_found = False
+            # Go through all ingredients listed in the recipe
+            for ingredient in ingredients:
+                if isinstance(ingredient, dict) and 'ingredient' in ingredient and 'heat_processed' in ingredient:
+                    # Match ingredient name and ensure it is heat-processed
+                    if match_ingredient(ingredient['ingredient'], user_input_ingredient) and ingredient['heat_processed']:
+                        ingredient_found = True
+                        break # No need to search further if matched
+
+            # If the current user input ingredient was not found in the recipe, then reject this recipe
+            if not ingredient_found:
+                all_ingredients_matched = False
+                break
+        # If all user ingredients are matched in the recipe, add the recipe to the result
+        if all_ingredients_matched:
+            result.append(row)
+    return result
+
+
+# Bytes compared at the start and at the end of the part of the catalogue already read, to detect a rewrite
+FINGERPRINT_BYTES = 4096
+
+# Index versions, unique in the process so that a new index never reuses the version of an old one
+_index_versions = itertools.count(1)
+
+
+# Path of the manifest that LLM/merge_results.py writes next to the catalogue
+def catalogue_manifest_path(catalogue_path):
+    return os.path.splitext(catalogue_path)[0] + '.manifest.json'
+
+
+# Build a bitset (Python int) from a list of recipe ids starting at start_id
+def ids_to_bits(ids, start_id=0, count=None):
+    """
+    Build a bitset with one bit set per recipe id.
+    Args:
+        ids (iterable of int): Recipe ids, all >= start_id.
+        start_id (int): Id of the lowest bit of the block being built.
+        count (int): Number of ids covered by the block (defaults to the highest id + 1).
+    Returns:
+        int: Bitset where bit i is set if recipe id i is in ids.
+    """
+    ids = list(ids)
+    if not ids:
+        return 0
+    if count is None:
+        count = max(ids) - start_id + 1
+    block = bytearray((count + 7) // 8)
+    for i in ids:
+        offset = i - start_id
+        block[offset >> 3] |= 1 << (offset & 7)
+    return int.from_bytes(block, 'little') << start_id
+
+
+class RecipeIndex:
+    """
+    In-memory search structures over the recipe catalogue.
+    Recipe ids are row positions in the catalogue, so results come back in catalogue order.
+    """
+
+    def __init__(self, catalogue_path=None):
+        self.catalogue_path = catalogue_path
+        self.lock = threading.RLock()   # reentrant: search() calls the other reads
+        self._reset()
+
+    def _reset(self):
+        self.version = next(_index_versions)    # changes whenever recipes are added or the index is reset
+        self.columns = None
+        self.recipes = []           # row dicts (without ingredients_processed), position = recipe id
+        self.vocabulary = IngredientVocabulary()
+        self.ingredient_ids = array('I')         # ingredient ids of all recipes, one after the other
+        self.ingredient_offsets = array('Q', [0])  # recipe id -> start of its ingredients in ingredient_ids
+        self.heat_bits = bytearray()             # bit i set if ingredient_ids[i] is heat processed
+        self.postings = []          # ingredient id -> array of recipe ids where it is heat processed
+        self.tag_bits = {}          # cuisine tag -> bitset of recipe ids
+        self.valid_tags_bits = 0    # recipes whose cuisine_tags could be parsed
+        self.vegan_bits = 0
+        self.vegetarian_bits = 0
+        self._offset = 0            # bytes of the catalogue already read
+        self._fingerprint = (b'', b'')  # first and last bytes of the part already read (catalogues without manifest)
+        self._catalogue_id = None
+
+    @classmethod
+    def from_csv(cls, catalogue_path):
+        index = cls(catalogue_path)
+        index.refresh()
+        return index
+
+    @classmethod
+    def from_dataframe(cls, df):
+        index = cls()
+        index.columns = list(df.columns)
+        index.add_recipes(df)
+        return index
+
+    def __len__(self):
+        with self.lock:
+            return len(self.recipes)
+
+    def recipe(self, recipe_id):
+        with self.lock:
+            return self.recipes[recipe_id]
+
+    def recipe_ingredients(self, recipe_id):
+        """Return (ingredient id, heat processed) pairs of a recipe."""
+        with self.lock:
+            start, end = self.ingredient_offsets[recipe_id], self.ingredient_offsets[recipe_id + 1]
+            return [(self.ingredient_ids[i], bool(self.heat_bits[i >> 3] >> (i & 7) & 1)) for i in range(start, end)]
+
+    def heat_processed_ingredients(self, recipe_id):
+        """Return the ids of the heat-processed ingredients of a recipe."""
+        return [ingredient_id for ingredient_id, heat in self.recipe_ingredients(recipe_id) if heat]
+
+    def refresh(self):
+        """
+        Pick up rows appended to the catalogue since the last call.
+        Only bytes committed in the merge manifest are read, so a merge that is still
+        being written is picked up on a later call. A catalogue without manifest (written by
+        recipes_table_prep.ipynb) is reloaded from scratch whenever it was rewritten instead of grown.
+        If the new rows cannot be parsed, the index is left as it was and they are retried on the next call.
+        Returns:
+            int: The number of recipes added to the index.
+        """
+        with self.lock:
+            manifest_path = catalogue_manifest_path(self.catalogue_path)
+            if os.path.exists(manifest_path):
+                with open(manifest_path) as f:
+                    manifest = json.load(f)
+                committed = manifest['catalogue_bytes']
+                catalogue_id = manifest.get('catalogue_id')
+            else:
+                # Catalogue written by recipes_table_prep.ipynb, without a manifest
+                committed = os.path.getsize(self.catalogue_path)
+                catalogue_id = None
+
+            # The catalogue was rebuilt from scratch: start over. The notebook rewrites the whole file (in any
+            # shard order), so without a manifest the bytes already read must still be the same
+            rebuilt = catalogue_id != self._catalogue_id or committed < self._offset
+            if not rebuilt and catalogue_id is None:
+                with open(self.catalogue_path, 'rb') as f:
+                    rebuilt = self._read_fingerprint(f, self._offset) != self._fingerprint
+            start = 0 if rebuilt else self._offset
+
+            if committed == start:
+                if rebuilt:
+                    self._reset()
+                    self._catalogue_id = catalogue_id
+                return 0
+
+            with open(self.catalogue_path, 'rb') as f:
+                f.seek(start)
+                data = f.read(committed - start)
+                # Stop after the last complete line: the notebook may still be writing a row
+                data = data[:data.rfind(b'\n') + 1]
+                fingerprint = self._read_fingerprint(f, start + len(data))
+            if not data:
+                return 0
+
+            # Parse before touching the index, so a bad delta leaves it as it was
+            columns = None if rebuilt else self.columns
+            try:
+                if columns is None:
+                    delta = pd.read_csv(io.BytesIO(data))
+                    columns = list(delta.columns)
+                else:
+                    delta = pd.read_csv(io.BytesIO(data), header=None, names=columns)
+            except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as e:
+                print(f"Could not read the new rows of {self.catalogue_path}: {e}. Keeping the index as it was.")
+                return 0
+
+            if rebuilt:
+                self._reset()
+                self._catalogue_id = catalogue_id
+            self.columns = columns
+            self._offset = start + len(data)
+            self._fingerprint = fingerprint
+            self.add_recipes(delta)
+            return len(delta)
+
+    @staticmethod
+    def _read_fingerprint(f, offset):
+        # First and last FINGERPRINT_BYTES of the first offset bytes of the open catalogue file
+        f.seek(0)
+        head = f.read(min(offset, FINGERPRINT_BYTES))
+        f.seek(max(0, offset - FINGERPRINT_BYTES))
+        tail = f.read(min(offset, FINGERPRINT_BYTES))
+        return head, tail
+
+    def add_recipes(self, df):
+        """
+        Merge a block of catalogue rows into the search structures.
+        Args:
+            df (pd.DataFrame): Rows in the merged_final_results.csv schema.
+        """
+        with self.lock:
+            start_id = len(self.recipes)
+
+            # Same dietary semantics as the app: only an explicit "false" excludes a recipe
+            vegan = df['vegan'].astype(str).str.lower() != 'false'
+            vegetarian = df['vegetarian'].astype(str).str.lower() != 'false'
+            # Fix wrongly labeled recipes that mention steak
+            steak = df['ingredients_raw'].str.contains('steak', case=False, na=False)
+            vegan = (vegan & ~steak).tolist()
+            vegetarian = (vegetarian & ~steak).tolist()
+
+            vegan_ids, vegetarian_ids, valid_tag_ids = [], [], []
+            tag_ids = {}
+
+            for offset, row in enumerate(df.to_dict('records')):
+                recipe_id = start_id + offset
+                # The ingredients are kept as ids below, not as the JSON string
+                ingredients_processed = row.pop('ingredients_processed', None)
+                self.recipes.append(row)
+
+                if vegan[offset]:
+                    vegan_ids.append(recipe_id)
+                if vegetarian[offset]:
+                    vegetarian_ids.append(recipe_id)
+
+                # Intern the ingredients; an ingredient listed twice is heat processed if either entry is
+                heat_by_id = {}
+                try:
+                    for ingredient in json.loads(ingredients_processed):
+                        if isinstance(ingredient, dict) and 'ingredient' in ingredient and 'heat_processed' in ingredient:
+                            if isinstance(ingredient['ingredient'], str):
+                                ingredient_id = self.vocabulary.intern(ingredient['ingredient'])
+                                heat_by_id[ingredient_id] = heat_by_id.get(ingredient_id, False) or bool(ingredient['heat_processed'])
+                except (json.JSONDecodeError, TypeError):
+                    heat_by_id = {}
+                self._append_ingredients(recipe_id, heat_by_id)
+
+                # Cuisine tags; recipes with unreadable tags never pass the tag filter
+                try:
+                    val = row['cuisine_tags']
+                    tags = set(json.loads(val) if isinstance(val, str) else val)
+                except Exception:
+                    continue
+                valid_tag_ids.append(recipe_id)
+                for tag in tags:
+                    tag_ids.setdefault(tag, []).append(recipe_id)
+
+            count = len(df)
+            self.vegan_bits |= ids_to_bits(vegan_ids, start_id, count)
+            self.vegetarian_bits |= ids_to_bits(vegetarian_ids, start_id, count)
+            self.valid_tags_bits |= ids_to_bits(valid_tag_ids, start_id, count)
+            for tag, ids in tag_ids.items():
+                self.tag_bits[tag] = self.tag_bits.get(tag, 0) | ids_to_bits(ids, start_id, count)
+            self.version = next(_index_versions)
+
+    def _append_ingredients(self, recipe_id, heat_by_id):
+        for ingredient_id, heat in heat_by_id.items():
+            position = len(self.ingredient_ids)
+            self.ingredient_ids.append(ingredient_id)
+            if position >> 3 >= len(self.heat_bits):
+                self.heat_bits.append(0)
+            if heat:
+                self.heat_bits[position >> 3] |= 1 << (position & 7)
+                while ingredient_id >= len(self.postings):
+                    self.postings.append(array('I'))
+                self.postings[ingredient_id].append(recipe_id)
+        self.ingredient_offsets.append(len(self.ingredient_ids))
+
+    def tags(self):
+        """Return the set of cuisine tags present in the catalogue."""
+        with self.lock:
+            return {tag.strip() for tag in self.tag_bits if isinstance(tag, str)}
+
+    def ingredient_postings(self, user_input_ingredient):
+        """Return the postings (arrays of recipe ids) of the ingredients matching the user input."""
+        with self.lock:
+            return [self.postings[ingredient_id] for ingredient_id in self.vocabulary.lookup(user_input_ingredient)
+                    if ingredient_id < len(self.postings)]
+
+    def recipes_with_ingredient(self, user_input_ingredient):
+        """Return the ids of the recipes where an ingredient matching the user input is heat processed."""
+        recipe_ids = set()
+        with self.lock:
+            for ingredient_id in self.vocabulary.lookup(user_input_ingredient):
+                if ingredient_id < len(self.postings):
+                    recipe_ids.update(self.postings[ingredient_id])
+        return recipe_ids
+
+    def _any_tag_bits(self, tags):
+        bits = 0
+        for tag in tags:
+            bits |= self.tag_bits.get(tag, 0)
+        return bits
+
+    def allowed_recipes(self, vegan=False, vegetarian=False, cuisines=(), other_tags=()):
+        """
+        Combine the dietary and tag filters.
+        Returns:
+            bytes: Bitmask over recipe ids; recipe i passes the filters if allowed[i >> 3] >> (i & 7) & 1.
+        """
+        with self.lock:
+            allowed = self.valid_tags_bits
+            if cuisines:
+                allowed &= self._any_tag_bits(cuisines)
+            if other_tags:
+                allowed &= self._any_tag_bits(other_tags)
+            if vegan:
+                allowed &= self.vegan_bits
+            if vegetarian:
+                allowed &= self.vegetarian_bits
+            return allowed.to_bytes((len(self.recipes) + 7) // 8, 'little')
+
+    def search(self, ingredient_names, vegan=False, vegetarian=False, cuisines=(), other_tags=()):
+        """
+        Find recipes where every user ingredient matches a heat-processed ingredient.
+        Ingredient names are matched in canonical form (see ingredient_vocabulary.canonical_ingredient_name).
+        Args:
+            ingredient_names (list): Ingredients entered by the user.
+            vegan (bool): Only keep vegan recipes.
+            vegetarian (bool): Only keep vegetarian recipes.
+            cuisines (list): Keep recipes with any of these cuisine tags (no filter if empty).
+            other_tags (list): Keep recipes with any of these other tags (no filter if empty).
+        Returns:
+            list: Matching recipe ids in catalogue order.
+        """
+        with self.lock:
+            candidates = None
+            for user_input_ingredient in ingredient_names:
+                ids = self.recipes_with_ingredient(user_input_ingredient)
+                candidates = ids if candidates is None else candidates & ids
+                if not candidates:
+                    return []
+            if candidates is None:
+                candidates = range(len(self.recipes))
+
+            allowed = self.allowed_recipes(vegan, vegetarian, cuisines, other_tags)
+            return sorted(i for i in candidates if allowed[i >> 3] >> (i & 7) & 1)
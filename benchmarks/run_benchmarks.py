@@ -0,0 +1,510 @@
+# Reproducible benchmarks for the recommender app and the labeling pipeline.
+# Runs offline on synthetic catalogues and saved HTML fixtures, and writes all results to one JSON file
+# so that runs can be compared to catch regressions.
+#
+# Usage (from the repository root):
+#   > python benchmarks/run_benchmarks.py                                  # 10k recipes
+#   > python benchmarks/run_benchmarks.py --sizes 10000 100000 1000000
+#   > python benchmarks/run_benchmarks.py --tiny-model /path/to/tiny-model  # also time process_batch.py
+#
+# Measured:
+#   - catalogue: load time, filter time and match latency (p50/p99) for every engine in ENGINES,
+#     and pantry planner latency (p50/p99) on large inventories
+#   - planner: pantry planner latency on the larger --planner-sizes catalogues (1M recipes by default), built
+#     straight into a recipe index since the row-scan engines are too slow at that size
+#   - real_catalogue: every ingredient word and name of LLM/merged_final_results.csv as a query, checking that the
+#     recipe index returns every recipe the original row scan returns (skipped if the catalogue was not merged)
+#   - scraper_parse: pages/sec of the scraper's parsing on benchmarks/fixtures (needs scraping/scraper_requirements.txt)
+#   - process_batch: recipes/sec and decode tokens/sec of LLM/process_batch.py with a tiny local model, per decoding
+#     mode, and whether the accelerated modes generate the same tokens (needs torch and transformers)
+
+
+# Imports
+import argparse
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, os.path.join(REPO_ROOT, 'app'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'scraping'))
+
+from pantry_planner import plan_recipes
+from recipe_index import RecipeIndex, find_heat_processed_ingredient, normalize_ingredient_name
+from synthetic_catalogue import make_catalogue, make_inventories, make_queries
+# ----------------------------------------------------
+
+FIXTURES_DIR = os.path.join(BENCHMARKS_DIR, 'fixtures')
+# A host recipe-scrapers supports (the scraper's test website), so the fixtures are parsed as during scraping
+FIXTURE_URL = 'https://www.archanaskitchen.com/recipes/'
+FIXTURE_RECIPE_URL = 'https://www.archanaskitchen.com/recipe/roasted-tomato-soup/'
+REAL_CATALOGUE_PATH = os.path.join(REPO_ROOT, 'LLM', 'merged_final_results.csv')
+
+
+# Nearest-rank percentile of a list of timings
+def percentile(values, q):
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+# Summarise a list of timings (seconds) in milliseconds
+def latency_summary(seconds):
+    return {
+        'n': len(seconds),
+        'p50_ms': percentile(seconds, 50) * 1000,
+        'p99_ms': percentile(seconds, 99) * 1000,
+        'mean_ms': sum(seconds) / len(seconds) * 1000,
+    }
+
+
+# --- Reference engine: the app's search before the recipe index ---
+# Filter recipes by cuisine or tag selections
+def reference_filter(df, cuisines, other_tags):
+    def recipe_matches_filters(row):
+        try:
+            tags = json.loads(row['cuisine_tags']) if isinstance(row['cuisine_tags'], str) else row['cuisine_tags']
+            tags_set = set(tags)
+            cuisine_ok = not cuisines or any(tag in tags_set for tag in cuisines)
+            other_ok = not other_tags or any(tag in tags_set for tag in other_tags)
+            return cuisine_ok and other_ok
+        except Exception:
+            return False
+
+    df = df[df.apply(recipe_matches_filters, axis=1)].copy()
+
+    # Convert string "TRUE"/"FALSE" to boolean True/False
+    df['vegan'] = df['vegan'].astype(str).str.lower().map({'true': True, 'false': False})
+    df['vegetarian'] = df['vegetarian'].astype(str).str.lower().map({'true': True, 'false': False})
+
+    # Fix wrongly labeled recipes that mention steak
+    df.loc[
+        df['ingredients_raw'].str.contains('steak', case=False, na=False),
+        ['vegan', 'vegetarian']
+    ] = False
+    return df
+
+
+class ReferenceEngine:
+    """Row-by-row scan of the catalogue DataFrame, as app.py did before RecipeIndex."""
+
+    def __init__(self, catalogue_path):
+        self.df = pd.read_csv(catalogue_path)
+
+    def filter(self, query):
+        return reference_filter(self.df, query['cuisines'], query['other_tags'])
+
+    def search(self, query):
+        df = self.filter(query)
+        ingredient_names = [normalize_ingredient_name(name) for name in query['ingredient_names']]
+        rows = find_heat_processed_ingredient(df, ingredient_names, query['vegan'], query['vegetarian'])
+        return [row['title'] for row in rows]
+
+
+class RecipeIndexEngine:
+    """Interned ingredient ids, postings and tag bitsets (app/recipe_index.py)."""
+
+    def __init__(self, catalogue_path):
+        self.index = RecipeIndex.from_csv(catalogue_path)
+
+    def filter(self, query):
+        return self.index.search([], query['vegan'], query['vegetarian'], query['cuisines'], query['other_tags'])
+
+    def search(self, query):
+        ids = self.index.search(query['ingredient_names'], query['vegan'], query['vegetarian'], query['cuisines'], query['other_tags'])
+        return [self.index.recipe(recipe_id)['title'] for recipe_id in ids]
+
+
+# Engines compared in the catalogue benchmark; the first one is the reference
+ENGINES = {
+    'reference': ReferenceEngine,
+    'recipe_index': RecipeIndexEngine,
+}
+
+
+# Benchmark the app-side search on one synthetic catalogue
+def bench_catalogue(n_recipes, args, tmp_dir):
+    """
+    Time catalogue load, filtering and matching of every engine on a synthetic catalogue.
+    Args:
+        n_recipes (int): Size of the synthetic catalogue.
+        args (argparse.Namespace): Command-line options.
+        tmp_dir (str): Directory for the generated catalogue.
+    Returns:
+        dict: Timings per engine, and whether every engine returned the reference results.
+    """
+    print(f"\n--- Catalogue with {n_recipes} recipes ---")
+    catalogue_path = os.path.join(tmp_dir, f'catalogue_{n_recipes}.csv')
+    start = time.perf_counter()
+    make_catalogue(n_recipes, seed=args.seed).to_csv(catalogue_path, index=False)
+    print(f"Generated catalogue in {time.perf_counter() - start:.1f} s")
+
+    queries = make_queries(args.queries, seed=args.seed)
+    result = {'n_recipes': n_recipes, 'catalogue_bytes': os.path.getsize(catalogue_path), 'engines': {}}
+    reference_results = None
+
+    for name, engine_class in ENGINES.items():
+        n_queries = len(queries)
+        if engine_class is ReferenceEngine:
+            if n_recipes > args.reference_max_recipes:
+                print(f"{name}: skipped (more than {args.reference_max_recipes} recipes)")
+                result['engines'][name] = {'skipped': f"more than {args.reference_max_recipes} recipes"}
+                continue
+            n_queries = min(n_queries, args.reference_queries)
+
+        start = time.perf_counter()
+        engine = engine_class(catalogue_path)
+        load_seconds = time.perf_counter() - start
+
+        filter_seconds, match_seconds, results = [], [], []
+        for query in queries[:n_queries]:
+            start = time.perf_counter()
+            engine.filter(query)
+            filter_seconds.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            results.append(engine.search(query))
+            match_seconds.append(time.perf_counter() - start)
+
+        engine_result = {
+            'load_s': load_seconds,
+            'filter': latency_summary(filter_seconds),
+            'match': latency_summary(match_seconds),
+        }
+        if reference_results is None:
+            reference_results = results
+        else:
+            engine_result.update(compare_with_reference(reference_results, results))
+
+        result['engines'][name] = engine_result
+        print(f"{name}: load {load_seconds:.2f} s, "
+              f"filter p50 {engine_result['filter']['p50_ms']:.2f} ms, "
+              f"match p50 {engine_result['match']['p50_ms']:.2f} ms / p99 {engine_result['match']['p99_ms']:.2f} ms")
+
+        if engine_class is RecipeIndexEngine:
+            result['planner'] = bench_planner(engine.index, args)
+
+    return result
+
+
+# Benchmark the pantry planner alone on a large synthetic catalogue
+def bench_planner_catalogue(n_recipes, args):
+    """
+    Time the pantry planner on a synthetic catalogue loaded straight into a recipe index.
+    Args:
+        n_recipes (int): Size of the synthetic catalogue.
+        args (argparse.Namespace): Command-line options.
+    Returns:
+        dict: Index build time and planner results.
+    """
+    print(f"\n--- Pantry planner on {n_recipes} recipes ---")
+    start = time.perf_counter()
+    df = make_catalogue(n_recipes, seed=args.seed)
+    print(f"Generated catalogue in {time.perf_counter() - start:.1f} s")
+
+    start = time.perf_counter()
+    index = RecipeIndex.from_dataframe(df)
+    build_seconds = time.perf_counter() - start
+    print(f"Built recipe index in {build_seconds:.1f} s")
+
+    return {'n_recipes': n_recipes, 'index_build_s': build_seconds, 'planner': bench_planner(index, args)}
+
+
+# Compare the results of an engine with the reference results of the same queries
+def compare_with_reference(reference_results, results):
+    """
+    Check that an engine returns every recipe the reference returns.
+    Folding plurals and synonyms may add matches, which are counted separately.
+    Args:
+        reference_results (list): Matching recipes of each query for the reference engine.
+        results (list): Matching recipes of the same queries for the engine.
+    Returns:
+        dict: matches_reference (no reference match lost), and the lost and extra matches.
+    """
+    lost, extra, queries_losing, queries_adding = 0, 0, 0, 0
+    for reference, result in zip(reference_results, results):
+        n_lost = len(set(reference) - set(result))
+        n_extra = len(set(result) - set(reference))
+        lost += n_lost
+        extra += n_extra
+        queries_losing += n_lost > 0
+        queries_adding += n_extra > 0
+    return {
+        'matches_reference': lost == 0,
+        'queries_compared': min(len(reference_results), len(results)),
+        'queries_losing_matches': queries_losing,
+        'lost_matches': lost,
+        'queries_with_extra_matches': queries_adding,
+        'extra_matches': extra,
+    }
+
+
+# Check the recipe index against the original row scan on the real catalogue
+def check_real_catalogue(args):
+    """
+    Run every ingredient word and ingredient name of the real catalogue as a single-ingredient query, through
+    the original row scan and through the recipe index, and check that the index loses no match.
+    Args:
+        args (argparse.Namespace): Command-line options.
+    Returns:
+        dict: Lost and extra matches (see compare_with_reference) and the queries that lose matches,
+              or the reason the check was skipped.
+    """
+    print("\n--- Real catalogue ---")
+    if not os.path.exists(args.real_catalogue):
+        print(f"Skipped: {args.real_catalogue} not found (run LLM/merge_results.py first)")
+        return {'skipped': f"{args.real_catalogue} not found"}
+
+    df = reference_filter(pd.read_csv(args.real_catalogue), [], [])
+    index = RecipeIndex.from_csv(args.real_catalogue)
+
+    # Recipes where each normalized ingredient name is heat processed, so every distinct name is checked once per query
+    # (the matching of find_heat_processed_ingredient, without rescanning every row for every query)
+    recipes_by_name = {}
+    queries = set()
+    for recipe_id, ingredients_processed in zip(df.index, df['ingredients_processed']):
+        try:
+            ingredients = json.loads(ingredients_processed)
+        except (json.JSONDecodeError, TypeError):
+            continue
+        for ingredient in ingredients:
+            if isinstance(ingredient, dict) and 'ingredient' in ingredient and 'heat_processed' in ingredient:
+                if isinstance(ingredient['ingredient'], str) and ingredient['heat_processed']:
+                    name = normalize_ingredient_name(ingredient['ingredient'])
+                    recipes_by_name.setdefault(name, set()).add(recipe_id)
+                    # Queries as a user would type them: whole ingredient names and single words
+                    queries.add(ingredient['ingredient'].lower().strip())
+                    queries.update(ingredient['ingredient'].lower().split())
+    queries = sorted(query for query in queries if query)
+
+    reference_results, results = [], []
+    for query in queries:
+        # Same rule as match_ingredient: a single word matches inside names, several words only the exact name
+        user_ing = normalize_ingredient_name(query)
+        if len(user_ing.split()) == 1:
+            matching = set().union(*(recipe_ids for name, recipe_ids in recipes_by_name.items() if user_ing in name))
+        else:
+            matching = recipes_by_name.get(user_ing, set())
+        reference_results.append(sorted(matching))
+        results.append(index.search([query]))
+
+    result = compare_with_reference(reference_results, results)
+    result['losing_queries'] = [query for query, reference, found in zip(queries, reference_results, results)
+                                if set(reference) - set(found)]
+    print(f"{len(queries)} queries: {result['lost_matches']} matches lost in {result['queries_losing_matches']} queries, "
+          f"{result['extra_matches']} extra matches in {result['queries_with_extra_matches']} queries")
+    if result['losing_queries']:
+        print(f"Queries losing matches: {', '.join(result['losing_queries'][:20])}")
+    return result
+
+
+# Benchmark the pantry planner on one recipe index
+def bench_planner(index, args):
+    """
+    Time plan_recipes on random inventories of --inventory-items items.
+    Args:
+        index (RecipeIndex): The loaded recipe index.
+        args (argparse.Namespace): Command-line options.
+    Returns:
+        dict: Planner latency and the average share of inventory items used up.
+    """
+    inventories = make_inventories(args.inventories, args.inventory_items, seed=args.seed)
+    plan_seconds, used_shares = [], []
+    for inventory in inventories:
+        start = time.perf_counter()
+        plan, unused = plan_recipes(index, inventory, args.planned_recipes)
+        plan_seconds.append(time.perf_counter() - start)
+        n_items = len(set(inventory))
+        used_shares.append((n_items - len(unused)) / n_items)
+
+    result = {
+        'inventory_items': args.inventory_items,
+        'max_recipes': args.planned_recipes,
+        'latency': latency_summary(plan_seconds),
+        'mean_share_used': sum(used_shares) / len(used_shares),
+    }
+    print(f"planner: {args.inventory_items} items, p50 {result['latency']['p50_ms']:.2f} ms / p99 {result['latency']['p99_ms']:.2f} ms")
+    return result
+
+
+# Benchmark the scraper's parsing on saved HTML pages
+def bench_scraper_parse(args):
+    """
+    Time the parsing done by scraping/scraper.py on the saved HTML fixtures.
+    Args:
+        args (argparse.Namespace): Command-line options.
+    Returns:
+        dict: Pages/sec for listing pages and recipe pages, or the reason the benchmark was skipped.
+    """
+    print("\n--- Scraper parsing ---")
+    try:
+        from bs4 import BeautifulSoup
+        from scraper import check_if_recipes_on_page, parse_recipe_html
+    except ImportError as e:
+        print(f"Skipped: {e}")
+        return {'skipped': str(e)}
+
+    with open(os.path.join(FIXTURES_DIR, 'listing_page.html')) as f:
+        listing_html = f.read()
+    with open(os.path.join(FIXTURES_DIR, 'recipe_page.html')) as f:
+        recipe_html = f.read()
+
+    # Listing pages: find the recipe links, as read_recipes_on_page does
+    start = time.perf_counter()
+    for _ in range(args.parse_iterations):
+        page_soup = BeautifulSoup(listing_html, "html.parser")
+        links = check_if_recipes_on_page(FIXTURE_URL, page_soup)
+    listing_seconds = time.perf_counter() - start
+
+    # Recipe pages: the parse stage of the scraping pipeline
+    start = time.perf_counter()
+    for _ in range(args.parse_iterations):
+        recipe, _ = parse_recipe_html(recipe_html, FIXTURE_RECIPE_URL)
+    recipe_seconds = time.perf_counter() - start
+    if recipe is None:
+        print("Skipped: the recipe fixture could not be parsed")
+        return {'skipped': "the recipe fixture could not be parsed"}
+
+    result = {
+        'iterations': args.parse_iterations,
+        'listing_pages_per_s': args.parse_iterations / listing_seconds,
+        'listing_links_found': len(links),
+        'recipe_pages_per_s': args.parse_iterations / recipe_seconds,
+        'recipe_ingredients_found': len(recipe['Ingredients']),
+    }
+    print(f"Listing pages: {result['listing_pages_per_s']:.1f} pages/s, recipe pages: {result['recipe_pages_per_s']:.1f} pages/s")
+    return result
+
+
+# Benchmark process_batch.py with a tiny local model
+def bench_process_batch(args, tmp_dir):
+    """
+    Run LLM/process_batch.py on a synthetic batch with a tiny local model, offline, once per decoding mode.
+    Args:
+        args (argparse.Namespace): Command-line options.
+        tmp_dir (str): Directory for the batch input and outputs.
+    Returns:
+        dict: Recipes/sec and decode tokens/sec per decoding mode, and whether each mode generated exactly
+              the same tokens as the first one, or the reason the benchmark was skipped.
+    """
+    print("\n--- process_batch.py ---")
+    if not args.tiny_model:
+        print("Skipped: no --tiny-model given")
+        return {'skipped': "no --tiny-model given"}
+
+    input_path = os.path.join(tmp_dir, 'batch_input.csv')
+    batch = make_catalogue(args.batch_recipes, seed=args.seed)
+    batch[['title', 'ingredients_raw', 'instructions', 'language', 'heat_processed', 'vegan', 'vegetarian']].to_csv(input_path, index=False)
+
+    result = {'model': args.tiny_model, 'max_new_tokens': args.max_new_tokens, 'decoding': {}}
+    first_responses = None
+
+    for mode in args.decoding_modes:
+        output_path = os.path.join(tmp_dir, f'batch_output_{mode}.csv')
+        responses_path = os.path.join(tmp_dir, f'batch_responses_{mode}.jsonl')
+        env = dict(os.environ,
+                   PROCESS_BATCH_MODEL=args.tiny_model,
+                   PROCESS_BATCH_MAX_NEW_TOKENS=str(args.max_new_tokens),
+                   PROCESS_BATCH_DECODING=mode,
+                   PROCESS_BATCH_RESPONSES_PATH=responses_path,
+                   HF_HUB_OFFLINE='1',
+                   TRANSFORMERS_OFFLINE='1')
+        if args.draft_model:
+            env['PROCESS_BATCH_DRAFT_MODEL'] = args.draft_model
+
+        start = time.perf_counter()
+        completed = subprocess.run([sys.executable, os.path.join(REPO_ROOT, 'LLM', 'process_batch.py'), input_path, output_path],
+                                   env=env, capture_output=True, text=True)
+        wall_seconds = time.perf_counter() - start
+
+        throughput = re.search(r"Processed (\d+) recipes in ([\d.]+) s \(([\d.]+) recipes/sec\)", completed.stdout)
+        decode = re.search(r"Generated (\d+) tokens in ([\d.]+) s \(([\d.]+) tokens/sec\)", completed.stdout)
+        if completed.returncode != 0 or not throughput:
+            print(f"{mode}: failed with exit code {completed.returncode}")
+            result['decoding'][mode] = {'failed': completed.stdout[-2000:] + completed.stderr[-2000:]}
+            continue
+
+        mode_result = {
+            'recipes': int(throughput.group(1)),
+            'loop_s': float(throughput.group(2)),
+            'recipes_per_s': float(throughput.group(3)),
+            'generated_tokens': int(decode.group(1)) if decode else 0,
+            'decode_tokens_per_s': float(decode.group(3)) if decode else 0.0,
+            'wall_s_including_model_load': wall_seconds,
+        }
+
+        # Greedy speculative decoding must generate exactly the tokens of plain decoding. Compare the raw
+        # generated tokens, not the parsed labels: a tiny random model fails to produce JSON in every mode
+        with open(responses_path) as f:
+            responses = {response['index']: response['generated_token_ids'] for response in map(json.loads, f)}
+        if first_responses is None:
+            first_responses = responses
+        else:
+            different = [index for index in first_responses.keys() | responses.keys()
+                         if first_responses.get(index) != responses.get(index)]
+            mode_result['same_output_as_' + args.decoding_modes[0]] = not different
+            mode_result['recipes_with_different_tokens'] = len(different)
+
+        result['decoding'][mode] = mode_result
+        print(f"{mode}: {mode_result['recipes_per_s']:.2f} recipes/sec, {mode_result['decode_tokens_per_s']:.1f} decode tokens/sec")
+
+    return result
+
+
+# Define main function to run the benchmarks
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for the recommender and the labeling pipeline.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000], help="Synthetic catalogue sizes")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the synthetic data")
+    parser.add_argument('--queries', type=int, default=200, help="Queries per engine")
+    parser.add_argument('--reference-queries', type=int, default=20, help="Queries for the (slow) reference engine")
+    parser.add_argument('--reference-max-recipes', type=int, default=100000, help="Largest catalogue the reference engine runs on")
+    parser.add_argument('--inventories', type=int, default=50, help="Inventories for the pantry planner")
+    parser.add_argument('--inventory-items', type=int, default=100, help="Items per pantry planner inventory")
+    parser.add_argument('--planner-sizes', type=int, nargs='*', default=[1000000],
+                        help="Synthetic catalogue sizes for the pantry planner alone (sizes in --sizes are skipped)")
+    parser.add_argument('--planned-recipes', type=int, default=10, help="Maximum recipes per pantry plan")
+    parser.add_argument('--real-catalogue', default=REAL_CATALOGUE_PATH, help="Merged catalogue for the matching check against the row scan")
+    parser.add_argument('--parse-iterations', type=int, default=200, help="Parses per HTML fixture")
+    parser.add_argument('--tiny-model', help="Local model directory for the process_batch.py benchmark")
+    parser.add_argument('--batch-recipes', type=int, default=10, help="Recipes in the process_batch.py benchmark")
+    parser.add_argument('--max-new-tokens', type=int, default=64, help="Generated tokens per recipe in the process_batch.py benchmark")
+    parser.add_argument('--decoding-modes', nargs='+', default=['default', 'prompt_lookup'],
+                        help="process_batch.py decoding modes to compare (default, prompt_lookup, draft_model)")
+    parser.add_argument('--draft-model', help="Local draft model directory for the draft_model decoding mode")
+    parser.add_argument('--output', default=os.path.join(BENCHMARKS_DIR, 'results.json'), help="Path of the JSON results file")
+    args = parser.parse_args()
+
+    results = {
+        'metadata': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'seed': args.seed,
+        },
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results['catalogue'] = [bench_catalogue(n_recipes, args, tmp_dir) for n_recipes in args.sizes]
+        results['planner'] = [bench_planner_catalogue(n_recipes, args)
+                              for n_recipes in args.planner_sizes if n_recipes not in args.sizes]
+        results['real_catalogue'] = check_real_catalogue(args)
+        results['scraper_parse'] = bench_scraper_parse(args)
+        results['process_batch'] = bench_process_batch(args, tmp_dir)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
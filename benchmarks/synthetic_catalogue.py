@@ -0,0 +1,144 @@
+# Synthetic recipe catalogues in the LLM/merged_final_results.csv schema, for benchmarks.
+# The same seed and size always give the same catalogue, so runs on different machines compare.
+#
+# Usage (from the repository root):
+#   > python benchmarks/synthetic_catalogue.py 100000 /tmp/catalogue_100k.csv
+
+
+# Imports
+import json
+import random
+import sys
+
+import pandas as pd
+# ----------------------------------------------------
+
+# Catalogue columns, in the order written by recipes_table_prep.ipynb
+COLUMNS = ['title', 'ingredients_raw', 'ingredients_processed', 'instructions', 'language',
+           'heat_processed', 'cuisine_tags', 'vegan', 'vegetarian', 'processing_error']
+
+# Building blocks for ingredient names, with the spelling variants the LLM produces
+INGREDIENT_NOUNS = ['tomato', 'onion', 'garlic', 'potato', 'carrot', 'pepper', 'mushroom', 'spinach',
+                    'zucchini', 'eggplant', 'broccoli', 'cauliflower', 'cabbage', 'leek', 'celery',
+                    'pumpkin', 'bean', 'lentil', 'chickpea', 'pea', 'corn', 'rice', 'pasta', 'noodle',
+                    'bread', 'apple', 'pear', 'banana', 'berry', 'lemon', 'ginger', 'chili', 'shallot',
+                    'cucumber', 'lettuce', 'kale', 'asparagus', 'beet', 'radish', 'squash', 'chicken',
+                    'beef', 'pork', 'salmon', 'shrimp', 'tofu', 'egg', 'cheese', 'butter', 'milk',
+                    'yogurt', 'olive oil', 'coconut milk', 'stock', 'flour', 'sugar', 'honey', 'oat']
+INGREDIENT_ADJECTIVES = ['', '', '', 'fresh', 'ripe', 'red', 'green', 'large', 'small', 'chopped',
+                         'roma', 'cherry', 'sweet', 'baby', 'dried', 'frozen', 'smoked', 'sliced']
+NON_VEGETARIAN = {'chicken', 'beef', 'pork', 'salmon', 'shrimp', 'stock'}
+NON_VEGAN = NON_VEGETARIAN | {'egg', 'cheese', 'butter', 'milk', 'yogurt', 'honey'}
+
+CUISINE_TAGS = ['American', 'Asian', 'British', 'Caribbean', 'Chinese', 'French', 'German', 'Greek',
+                'Indian', 'Italian', 'Japanese', 'Korean', 'Mediterranean', 'Mexican', 'Middle Eastern',
+                'Moroccan', 'Scandinavian', 'Spanish', 'Thai', 'Vietnamese']
+OTHER_TAGS = ['Comfort Food', 'Curry', 'Dessert', 'Fusion', 'Healthy', 'Quick', 'Salad', 'Soup',
+              'Street Food', 'Vegan', 'Vegetarian']
+
+
+# Build one ingredient name from the building blocks
+def random_ingredient(rng):
+    noun = rng.choice(INGREDIENT_NOUNS)
+    adjective = rng.choice(INGREDIENT_ADJECTIVES)
+    name = f"{adjective} {noun}" if adjective else noun
+    # Plural and capitalisation variants, as in the LLM output ("Romaine heart", "romaine hearts")
+    if rng.random() < 0.3:
+        name += 'es' if name.endswith('o') else 's'
+    if rng.random() < 0.3:
+        name = name.capitalize()
+    return noun, name
+
+
+# Generate a synthetic catalogue
+def make_catalogue(n_recipes, seed=0):
+    """
+    Generate a synthetic recipe catalogue.
+    Args:
+        n_recipes (int): Number of recipes.
+        seed (int): Seed of the random generator.
+    Returns:
+        pd.DataFrame: The catalogue in the merged_final_results.csv schema.
+    """
+    rng = random.Random(seed)
+    rows = []
+
+    for i in range(n_recipes):
+        n_ingredients = rng.randint(4, 14)
+        nouns = set()
+        raw, processed = [], []
+        for _ in range(n_ingredients):
+            noun, name = random_ingredient(rng)
+            nouns.add(noun)
+            raw.append(f"{rng.randint(1, 4)} cups {name}")
+            processed.append({'ingredient': name, 'heat_processed': rng.random() < 0.6})
+
+        tags = rng.sample(CUISINE_TAGS, rng.randint(1, 3)) + rng.sample(OTHER_TAGS, rng.randint(0, 2))
+        vegetarian = not (nouns & NON_VEGETARIAN)
+        vegan = not (nouns & NON_VEGAN)
+
+        rows.append({
+            'title': f"Synthetic recipe {i}",
+            'ingredients_raw': str(raw),
+            'ingredients_processed': json.dumps(processed),
+            'instructions': "Chop everything.\nCook over medium heat for 20 minutes.\nServe warm.",
+            'language': 'en',
+            'heat_processed': any(item['heat_processed'] for item in processed),
+            'cuisine_tags': json.dumps(tags),
+            'vegan': vegan,
+            'vegetarian': vegetarian,
+            'processing_error': None,
+        })
+
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+# Generate random user queries against the synthetic vocabulary
+def make_queries(n_queries, seed=0):
+    """
+    Generate random user inputs for the recommender.
+    Args:
+        n_queries (int): Number of queries.
+        seed (int): Seed of the random generator.
+    Returns:
+        list: Dictionaries with ingredient_names, vegan, vegetarian, cuisines and other_tags.
+    """
+    rng = random.Random(seed + 1)
+    queries = []
+    for _ in range(n_queries):
+        ingredient_names = []
+        for _ in range(rng.randint(1, 3)):
+            noun, name = random_ingredient(rng)
+            # Mostly single words (partial match), sometimes a full multi-word name (exact match)
+            ingredient_names.append(name.lower() if rng.random() < 0.2 else noun)
+        queries.append({
+            'ingredient_names': ingredient_names,
+            'vegan': rng.random() < 0.2,
+            'vegetarian': rng.random() < 0.3,
+            'cuisines': rng.sample(CUISINE_TAGS, 2) if rng.random() < 0.3 else [],
+            'other_tags': rng.sample(OTHER_TAGS, 1) if rng.random() < 0.1 else [],
+        })
+    return queries
+
+
+# Generate random inventories for the pantry planner
+def make_inventories(n_inventories, n_items, seed=0):
+    """
+    Generate random inventories of near-expiry items.
+    Args:
+        n_inventories (int): Number of inventories.
+        n_items (int): Items per inventory.
+        seed (int): Seed of the random generator.
+    Returns:
+        list: Lists of ingredient names, as entered by the user.
+    """
+    rng = random.Random(seed + 2)
+    return [[random_ingredient(rng)[1].lower() for _ in range(n_items)] for _ in range(n_inventories)]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python synthetic_catalogue.py <n_recipes> <output_csv_path>")
+        sys.exit(1)
+    make_catalogue(int(sys.argv[1])).to_csv(sys.argv[2], index=False)
+    print(f"Saved {sys.argv[1]} synthetic recipes to {sys.argv[2]}")
@@ -1,10 +1,19 @@
 # Load imports
 from recipe_scrapers import scrape_me, scrape_html
+from recipe_scrapers._abstract import HEADERS # Same browser-like headers scrape_me sends
 import requests
 
 from bs4 import BeautifulSoup
 import os
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlparse
+
+import argparse
+import csv
+import queue
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
 
 import pandas as pd
 import regex as re
@@ -262,15 +271,480 @@ def get_all_website_urls():
     return websites
 
 
+# ----------------------------------------------------
+# Staged pipeline: fetch -> parse -> write
+#
+# read_all_recipes_on_url does network waits, HTML parsing and result collection in one thread, so parsing
+# blocks fetching and fetching blocks parsing. In the pipeline:
+#   - the main thread walks the listing pages of every website and queues the recipe URLs,
+#   - fetcher threads download the recipe pages (I/O bound, one request per second per website),
+#   - a process pool parses the HTML with recipe_scrapers (CPU bound),
+#   - a single writer streams the rows to recipes.csv (or Parquet) as they arrive.
+# The stages are connected by bounded queues, so a slow stage makes the stages before it wait instead of
+# filling up memory, and the stage counters show which stage (or the per-website rate limit) is the bottleneck.
+# A stage that fails is logged and the others drain their queues, so a crash never hangs the pipeline.
+
+# Marks the end of the items in a queue
+_DONE = None
+
+# Minimum time between two requests to the same website (the sequential scraper sleeps 1 s per recipe)
+REQUEST_INTERVAL = 1.0
+
+
+# Parse a recipe from its HTML (runs in the parser processes)
+def parse_recipe_html(html, recipe_url):
+    """
+    Parse a single recipe from the HTML of the recipe page.
+    Args:
+        html (str): The HTML of the recipe page.
+        recipe_url (str): The URL of the recipe page.
+    Returns:
+        tuple: A dictionary with the recipe title, ingredients, instructions and URL (None if there is no recipe),
+               and the parsing time in seconds.
+    """
+    start = time.perf_counter()
+    try:
+        scraped = scrape_html(html, org_url=recipe_url)
+
+        # If there is no title, return None
+        if scraped.title() != None and scraped.title() != 'None' and scraped.title() != '':
+            recipe = {'Title': scraped.title(), 'Ingredients': scraped.ingredients(), 'Instructions': scraped.instructions(), 'URL': recipe_url}
+        else:
+            recipe = None
+
+    except Exception as e:
+        print(f"Error scraping recipe {recipe_url}: {e}")
+        recipe = None
+
+    return recipe, time.perf_counter() - start
+
+
+# Find the recipe URLs on all the pages of a website
+def discover_recipe_urls(website_url):
+    """
+    Walk the listing pages of a website, like read_all_recipes_on_url, without reading the recipes.
+    Args:
+        website_url (str): The base URL of the recipes website.
+    Yields:
+        str: The URL of each recipe found on the listing pages.
+    """
+    curr_page = 1   # Set current page and increment it by 1 for each page
+
+    # Some URLs end with a '/' and some do not, so we need to remove it; it is added when joining with '/recipes/'
+    if website_url[-1] == '/':
+        website_url = website_url[:-1]
+
+    try:
+        recipes_url = website_url+'/recipes/'
+        page_response = requests.get(recipes_url) # Throws an error if the page does not exist
+        if page_response.status_code != 200:
+            raise Exception(f"Page not found: {recipes_url}")
+    except:
+        print(f"Error accessing {recipes_url}. Trying the base URL.")
+        recipes_url = website_url
+
+    # IMPORTANT: Set a maximum page limit to avoid infinite loops!!!!
+    while curr_page < 100:
+        try:
+            # If the current page is 1, use the base URL, otherwise go to the next page
+            if curr_page == 1:
+                page_url = recipes_url
+            else:
+                page_url = go_to_next_page(recipes_url, curr_page)
+
+            print(f'Page {curr_page}: {page_url}')
+            page_soup = BeautifulSoup(requests.get(page_url).text, "html.parser")
+            recipes_on_page = check_if_recipes_on_page(page_url, page_soup)
+
+        except Exception as e:
+            print(f"Error reading recipes on page {curr_page}: {e}")
+            return
+
+        # If there are no recipes on the page, this was the last page
+        if not recipes_on_page:
+            return
+
+        for a in recipes_on_page:
+            try:
+                yield urljoin(page_url, a['href'])
+            except (KeyError, TypeError):
+                continue
+        curr_page += 1
+
+
+class StageCounters:
+    """
+    Counters of one pipeline stage.
+    busy_s is the time spent working, blocked_s the time spent waiting for room in the next queue
+    (backpressure) and rate_limited_s the time spent waiting for the per-website rate limit.
+    The stage with the highest utilization (or rate-limited share) is the bottleneck.
+    """
+
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.done = 0
+        self.errors = 0
+        self.busy_s = 0.0
+        self.blocked_s = 0.0
+        self.rate_limited_s = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, done=0, errors=0, busy_s=0.0, blocked_s=0.0, rate_limited_s=0.0):
+        with self._lock:
+            self.done += done
+            self.errors += errors
+            self.busy_s += busy_s
+            self.blocked_s += blocked_s
+            self.rate_limited_s += rate_limited_s
+
+    def utilization(self, elapsed_s):
+        return self.busy_s / (self.workers * elapsed_s) if elapsed_s > 0 else 0.0
+
+    def rate_limited_share(self, elapsed_s):
+        return self.rate_limited_s / (self.workers * elapsed_s) if elapsed_s > 0 else 0.0
+
+
+# Put an item in a bounded queue, counting the time spent waiting for room
+def put_counted(out_queue, item, counters, consumers):
+    """
+    Put an item in a bounded queue, waiting while the queue is full.
+    Args:
+        out_queue (queue.Queue): The queue to the next stage.
+        item: The item to put.
+        counters (StageCounters): Counters of the stage putting the item (blocked_s is increased).
+        consumers (list): Threads of the next stage; if they have all stopped, the item is dropped.
+    Returns:
+        bool: False if the item was dropped because the next stage is dead.
+    """
+    start = time.perf_counter()
+    try:
+        while any(thread.is_alive() for thread in consumers):
+            try:
+                out_queue.put(item, timeout=1.0)
+                return True
+            except queue.Full:
+                continue
+        return False
+    finally:
+        counters.add(blocked_s=time.perf_counter() - start)
+
+
+# Stream rows to a CSV or Parquet file
+class RecipeWriter:
+    """
+    Write recipes as they arrive, dropping duplicate titles and incomplete recipes like main() does.
+    Files ending in .parquet are written with pyarrow, in row groups of batch_size recipes.
+    """
+
+    COLUMNS = ['Title', 'Ingredients', 'Instructions', 'URL']
+
+    def __init__(self, output_path, batch_size=500):
+        self.output_path = output_path
+        self.batch_size = batch_size
+        self.seen_titles = set()
+        self.rows_written = 0
+        self._batch = []
+
+        if output_path.endswith('.parquet'):
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ImportError("Writing Parquet needs pyarrow: pip install pyarrow")
+            self._pa = pa
+            self._schema = pa.schema([('Title', pa.string()), ('Ingredients', pa.list_(pa.string())),
+                                      ('Instructions', pa.string()), ('URL', pa.string())])
+            self._parquet_writer = pq.ParquetWriter(output_path, self._schema)
+            self._csv_file = None
+        else:
+            self._parquet_writer = None
+            self._csv_file = open(output_path, 'w', newline='')
+            self._csv_writer = csv.writer(self._csv_file)
+            self._csv_writer.writerow(self.COLUMNS)
+
+    def write(self, recipe):
+        """Write a recipe; returns False if it was dropped."""
+        # Drop duplicate recipes based on the title, and make sure all columns are populated
+        if recipe['Title'] in self.seen_titles or len(recipe['Ingredients']) == 0 or recipe['Instructions'] == '':
+            return False
+        self.seen_titles.add(recipe['Title'])
+
+        self._batch.append(recipe)
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+        return True
+
+    def flush(self):
+        if not self._batch:
+            return
+        if self._parquet_writer is not None:
+            columns = {col: [recipe[col] for recipe in self._batch] for col in self.COLUMNS}
+            self._parquet_writer.write_table(self._pa.table(columns, schema=self._schema))
+        else:
+            # Same format as DataFrame.to_csv: the ingredients list is written as its string representation
+            self._csv_writer.writerows([[recipe['Title'], str(recipe['Ingredients']), recipe['Instructions'], recipe['URL']]
+                                        for recipe in self._batch])
+            self._csv_file.flush()
+        self.rows_written += len(self._batch)
+        self._batch = []
+
+    def close(self):
+        self.flush()
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+        else:
+            self._csv_file.close()
+
+
+class ScrapingPipeline:
+    """
+    Fetch -> parse -> write pipeline connected by bounded queues.
+    Args:
+        output_path (str): Path of the output file (.csv or .parquet).
+        n_fetchers (int): Number of fetcher threads.
+        n_parsers (int): Number of parser processes.
+        queue_size (int): Capacity of each queue between stages.
+        report_interval (float): Seconds between two progress reports of the stage counters.
+    """
+
+    def __init__(self, output_path, n_fetchers=8, n_parsers=2, queue_size=64, report_interval=30.0):
+        self.output_path = output_path
+        self.n_fetchers = n_fetchers
+        self.n_parsers = n_parsers
+        self.report_interval = report_interval
+
+        self.url_queue = queue.Queue(maxsize=queue_size)     # discovery -> fetchers
+        self.html_queue = queue.Queue(maxsize=queue_size)    # fetchers -> parsers
+        self.recipe_queue = queue.Queue(maxsize=queue_size)  # parsers -> writer
+
+        self.counters = {
+            'discover': StageCounters('discover', 1),
+            'fetch': StageCounters('fetch', n_fetchers),
+            'parse': StageCounters('parse', n_parsers),
+            'write': StageCounters('write', 1),
+        }
+        self._threads = {}          # stage -> threads, to check whether the next stage is still alive
+        self._next_request = {}     # website -> earliest time of the next request
+        self._rate_lock = threading.Lock()
+        self._finished = threading.Event()
+        self._start = None
+
+    def _wait_for_turn(self, url):
+        # Keep at most one request per REQUEST_INTERVAL to each website; returns the time waited
+        host = urlparse(url).netloc
+        with self._rate_lock:
+            now = time.monotonic()
+            turn = max(now, self._next_request.get(host, now))
+            self._next_request[host] = turn + REQUEST_INTERVAL
+        time.sleep(max(0.0, turn - now))
+        return max(0.0, turn - now)
+
+    def _run_stage(self, name, target, *args):
+        # Log a failed stage instead of letting the thread die silently; put_counted drops items for dead stages
+        try:
+            target(*args)
+        except Exception:
+            print(f"The {name} stage failed:")
+            traceback.print_exc()
+            self.counters[name].add(errors=1)
+
+    def _discover(self, websites):
+        counters = self.counters['discover']
+        seen_urls = set()
+        for website in websites:
+            print(f"Scraping recipes from {website}...")
+            start = time.perf_counter()
+            for recipe_url in discover_recipe_urls(website):
+                counters.add(busy_s=time.perf_counter() - start)
+                if recipe_url not in seen_urls:
+                    seen_urls.add(recipe_url)
+                    counters.add(done=1)
+                    put_counted(self.url_queue, recipe_url, counters, self._threads['fetch'])
+                start = time.perf_counter()
+            counters.add(busy_s=time.perf_counter() - start)
+
+    def _fetch(self):
+        counters = self.counters['fetch']
+        while True:
+            recipe_url = self.url_queue.get()
+            if recipe_url is _DONE:
+                return
+            counters.add(rate_limited_s=self._wait_for_turn(recipe_url))
+            start = time.perf_counter()
+            try:
+                response = requests.get(recipe_url, headers=HEADERS, timeout=30)
+                response.raise_for_status()
+            except Exception as e:
+                print(f"Error fetching recipe {recipe_url}: {e}")
+                counters.add(errors=1, busy_s=time.perf_counter() - start)
+                continue
+            counters.add(done=1, busy_s=time.perf_counter() - start)
+            put_counted(self.html_queue, (response.text, recipe_url), counters, self._threads['parse'])
+
+    def _parse(self):
+        counters = self.counters['parse']
+        # At most two pages per parser process in flight, so the parsers cannot run ahead of the writer
+        max_in_flight = 2 * self.n_parsers
+
+        def forward(futures):
+            for future in futures:
+                try:
+                    recipe, parse_seconds = future.result()
+                except Exception as e:
+                    # The parser process crashed (BrokenProcessPool) or its result could not be sent back
+                    print(f"Error in parser process: {e!r}")
+                    counters.add(errors=1)
+                    continue
+                counters.add(done=1 if recipe else 0, errors=0 if recipe else 1, busy_s=parse_seconds)
+                if recipe:
+                    put_counted(self.recipe_queue, recipe, counters, self._threads['write'])
+
+        pool = ProcessPoolExecutor(max_workers=self.n_parsers)
+        pending = set()
+        try:
+            while True:
+                item = self.html_queue.get()
+                if item is _DONE:
+                    break
+                try:
+                    future = pool.submit(parse_recipe_html, *item)
+                except BrokenProcessPool:
+                    # A crashed process breaks the whole pool: count the pages in flight as errors and start a new pool
+                    print("A parser process crashed; starting a new process pool.")
+                    forward(wait(pending)[0])
+                    pending = set()
+                    pool.shutdown(wait=False)
+                    pool = ProcessPoolExecutor(max_workers=self.n_parsers)
+                    future = pool.submit(parse_recipe_html, *item)
+                pending.add(future)
+                if len(pending) >= max_in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    forward(done)
+            forward(wait(pending)[0])
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    def _write(self, writer):
+        counters = self.counters['write']
+        while True:
+            recipe = self.recipe_queue.get()
+            if recipe is _DONE:
+                return
+            start = time.perf_counter()
+            try:
+                written = writer.write(recipe)
+            except Exception as e:
+                # Keep draining the queue, so the parsers never block on a failed writer
+                print(f"Error writing recipe {recipe.get('URL')}: {e}")
+                written = False
+            counters.add(done=1 if written else 0, errors=0 if written else 1, busy_s=time.perf_counter() - start)
+
+    def _report_progress(self):
+        while not self._finished.wait(self.report_interval):
+            print(self.report())
+
+    def report(self):
+        """Return a one-line summary of the stage counters and queue depths."""
+        elapsed_s = time.perf_counter() - self._start
+        stages = ", ".join(f"{c.name}: {c.done} done, {c.errors} dropped, {c.utilization(elapsed_s):.0%} busy"
+                           + (f", {c.rate_limited_share(elapsed_s):.0%} rate limited" if c.rate_limited_s else "")
+                           for c in self.counters.values())
+        queues = (f"queues url {self.url_queue.qsize()}/{self.url_queue.maxsize}, "
+                  f"html {self.html_queue.qsize()}/{self.html_queue.maxsize}, "
+                  f"recipe {self.recipe_queue.qsize()}/{self.recipe_queue.maxsize}")
+        return f"[{elapsed_s:.0f} s] {stages} | {queues}"
+
+    def summary(self):
+        """
+        Return the stage counters and the bottleneck: the busiest stage, or 'rate limit' if the fetchers
+        spent a larger share of their time waiting for the per-website rate limit than any stage spent working.
+        """
+        elapsed_s = time.perf_counter() - self._start
+        stages = {name: {'workers': c.workers, 'done': c.done, 'dropped': c.errors, 'busy_s': c.busy_s,
+                         'blocked_s': c.blocked_s, 'rate_limited_s': c.rate_limited_s,
+                         'utilization': c.utilization(elapsed_s)}
+                  for name, c in self.counters.items()}
+        shares = {name: stage['utilization'] for name, stage in stages.items()}
+        shares['rate limit'] = self.counters['fetch'].rate_limited_share(elapsed_s)
+        bottleneck = max(shares, key=shares.get)
+        return {'elapsed_s': elapsed_s, 'stages': stages, 'bottleneck': bottleneck}
+
+    def run(self, websites):
+        """
+        Scrape all the recipes from the websites into the output file.
+        Args:
+            websites (list): The base URLs of the recipes websites.
+        Returns:
+            int: The number of recipes written.
+        """
+        self._start = time.perf_counter()
+        writer = RecipeWriter(self.output_path)
+
+        fetchers = [threading.Thread(target=self._run_stage, args=('fetch', self._fetch), name=f'fetcher-{i}')
+                    for i in range(self.n_fetchers)]
+        parser = threading.Thread(target=self._run_stage, args=('parse', self._parse), name='parser')
+        writer_thread = threading.Thread(target=self._run_stage, args=('write', self._write, writer), name='writer')
+        reporter = threading.Thread(target=self._report_progress, name='reporter', daemon=True)
+        self._threads = {'fetch': fetchers, 'parse': [parser], 'write': [writer_thread]}
+        for thread in fetchers + [parser, writer_thread, reporter]:
+            thread.start()
+
+        try:
+            self._discover(websites)
+        finally:
+            # Shut the stages down in order, so every queued item is still processed;
+            # put_counted gives up on a stage that died, so a failed stage cannot hang the shutdown
+            for _ in fetchers:
+                put_counted(self.url_queue, _DONE, self.counters['discover'], fetchers)
+            for thread in fetchers:
+                thread.join()
+            put_counted(self.html_queue, _DONE, self.counters['fetch'], [parser])
+            parser.join()
+            put_counted(self.recipe_queue, _DONE, self.counters['parse'], [writer_thread])
+            writer_thread.join()
+            try:
+                writer.close()
+            except Exception as e:
+                print(f"Error closing {self.output_path}: {e}")
+            self._finished.set()
+
+        summary = self.summary()
+        print(self.report())
+        if summary['bottleneck'] == 'rate limit':
+            print(f"Bottleneck: the rate limit of one request every {REQUEST_INTERVAL} s per website")
+        else:
+            print(f"Bottleneck: {summary['bottleneck']} stage")
+        return writer.rows_written
+
+
 # Define main function to run the scraper
 def main():
-    
+
+    parser = argparse.ArgumentParser(description="Scrape recipes from the websites supported by recipe-scrapers.")
+    parser.add_argument('--sequential', action='store_true', help="Use the original single-threaded scraper")
+    parser.add_argument('--fetchers', type=int, default=8, help="Number of fetcher threads")
+    parser.add_argument('--parsers', type=int, default=len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count(),
+                        help="Number of parser processes")
+    parser.add_argument('--queue-size', type=int, default=64, help="Capacity of the queues between the stages")
+    parser.add_argument('--output', default='recipes/recipes.csv', help="Output file (.csv or .parquet)")
+    args = parser.parse_args()
+
     website_count = 0
 
     # Get all website URLs
     websites = get_all_website_urls()
     # websites = ['https://www.archanaskitchen.com/']   # test website
 
+    if not args.sequential:
+        output_dir = os.path.dirname(args.output)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        pipeline = ScrapingPipeline(args.output, n_fetchers=args.fetchers, n_parsers=args.parsers, queue_size=args.queue_size)
+        n_recipes = pipeline.run(websites)
+        print(f"Scraped {n_recipes} recipes from {len(websites)} websites into {args.output}.")
+        return n_recipes
+
     # Store all recipes
     all_recipes = []
 